@@ -19,7 +19,8 @@ done
 [ -d "./dist" ] && rm -rf ./dist
 
 # Remove launcher scripts
-filenames=("/usr/bin/nwg-displays" "/usr/bin/nwg-displays-apply" "/usr/bin/nwg-displays-toggle-wallpapers")
+filenames=("/usr/bin/nwg-displays" "/usr/bin/nwg-displays-apply" "/usr/bin/nwg-displays-toggle-wallpapers"
+           "/usr/bin/nwg-displays-daemon")
 
 for filename in "${filenames[@]}"; do
   if [ -f "$filename" ]; then
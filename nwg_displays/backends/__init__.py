@@ -0,0 +1,40 @@
+import importlib
+import os
+
+from .base import Backend
+
+# Backend name, environment variable set by the compositor, module and class; in the order of detection.
+BACKENDS = (
+    ("niri", "NIRI_SOCKET", "nwg_displays.backends.niri", "NiriBackend"),
+    ("sway", "SWAYSOCK", "nwg_displays.backends.sway", "SwayBackend"),
+    ("hyprland", "HYPRLAND_INSTANCE_SIGNATURE", "nwg_displays.backends.hyprland", "HyprlandBackend"),
+)
+
+_backend = None
+
+
+def detect_backend():
+    """Returns the name of the running compositor's backend, or None. Doesn't import anything."""
+    for name, env, module, cls in BACKENDS:
+        if os.getenv(env):
+            return name
+    return None
+
+
+def get_backend():
+    """Returns the Backend class of the running compositor, or None. Its module is imported on first use."""
+    global _backend
+    if _backend is None:
+        for name, env, module, cls in BACKENDS:
+            if os.getenv(env):
+                _backend = getattr(importlib.import_module(module), cls)
+                break
+    return _backend
+
+
+__all__ = [
+    "Backend",
+    "BACKENDS",
+    "detect_backend",
+    "get_backend",
+]
@@ -0,0 +1,56 @@
+class Backend:
+    """
+    Interface of compositor backends. Backends are selected at runtime by nwg_displays.backends.get_backend(),
+    and only the module of the running compositor gets imported.
+    """
+
+    # Backend name, as returned by nwg_displays.backends.detect_backend()
+    name = None
+    # Name of the Azote wallpaper batch file in $HOME, if Azote supports the compositor
+    azotebg_file = None
+
+    @staticmethod
+    def outputs_path():
+        """Returns the default path of the outputs config file."""
+        raise NotImplementedError
+
+    @staticmethod
+    def query_outputs():
+        """
+        Returns {"name": dict} of all the outputs known to the compositor, inactive included, in the format
+        accepted by OutputState.from_dict().
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def watch_events(watcher):
+        """Blocks, calling watcher.emit(kind, name) on output events, until watcher.stop() is called."""
+        raise NotImplementedError
+
+    @staticmethod
+    def apply_json(displays, use_desc, outputs_path, profile_data, cancelled=None):
+        """
+        Applies the "displays" of a profile JSON file. If `cancelled()` turns True in the meantime, the remaining
+        steps (e.g. applying wallpapers) are skipped.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def apply_gui(display_buttons, outputs_activity, outputs_path, use_desc, create_confirm_win_callback,
+                  config_dir=None, profile_name=None):
+        """
+        Applies the settings of the GUI DisplayButtons (or any objects exposing OutputLayout attributes).
+        If anything changed, calls `create_confirm_win_callback(journal, config_dir, profile_name)`
+        w/ the ApplyJournal of the apply.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def rollback(journal):
+        """Sends the commands reverting the changes of the ApplyJournal. Returns True if all of them succeeded."""
+        raise NotImplementedError
+
+    @staticmethod
+    def reload():
+        """Makes the compositor re-read its configuration."""
+        raise NotImplementedError
@@ -0,0 +1,267 @@
+import json
+import os
+import socket
+
+from nwg_displays.backends.base import Backend
+from nwg_displays.generators import hyprland_config, hyprland_keyword, is_active
+from nwg_displays.ipc.hyprland import get_hyprland_ipc
+from nwg_displays.layout import Layout
+from nwg_displays.readiness import wait_for_layout
+from nwg_displays.settings_applier.apply_journal import ApplyJournal
+from nwg_displays.settings_applier.output_diff import diff_outputs, target_from_button, target_from_display
+from nwg_displays.settings_applier.settings_applier import SettingsApplier
+from nwg_displays.tools import eprint, get_config, get_config_home, hyprctl, load_text_file, save_list_to_text_file
+from nwg_displays.wallpaper_manager import WallpaperManager
+
+
+class HyprlandBackend(Backend):
+    name = "hyprland"
+    azotebg_file = ".azotebg-hyprland"
+
+    @staticmethod
+    def outputs_path():
+        return os.path.join(get_config_home(), "hypr", "monitors.conf")
+
+    @staticmethod
+    def query_outputs():
+        # 2. This won't work w/ Hyprland <= 0.36.0
+        monitors = json.loads(hyprctl("j/monitors all"))
+        if monitors and "disabled" not in monitors[0]:
+            # Older Hyprland versions don't tell if a monitor is disabled; only active ones are listed w/o "all".
+            active = [item["name"] for item in json.loads(hyprctl("j/monitors"))]
+        else:
+            active = [item["name"] for item in monitors if not item["disabled"]]
+        outputs_dict = {}
+        for mon in monitors:
+            name = mon["name"]
+            outputs_dict[name] = {"active": True} if name in active else {"active": False}
+
+        eprint("Running on Hyprland")
+
+        # 1. Mirroring is impossible to check in any way. We need to parse back the monitors.conf file, and it sucks.
+        mirrors = {}
+        hypr_config_dir = os.path.join(get_config_home(), "hypr")
+        monitors_file = os.path.join(hypr_config_dir, "monitors.conf")
+        if os.path.isfile(monitors_file):
+            lines = load_text_file(monitors_file).splitlines()
+            for line in lines:
+                if line and not line.startswith("#"):  # skip comments
+                    if "mirror" in line:
+                        settings = line.split("=")[1].split(",")
+                        mirrors[settings[0].strip()] = settings[-1].strip()
+
+        transforms = {0: "normal", 1: "90", 2: "180", 3: "270", 4: "flipped", 5: "flipped-90", 6: "flipped-180",
+                      7: "flipped-270"}
+        for m in monitors:
+            outputs_dict[m["name"]]["mirror"] = mirrors[m["name"]] if m["name"] in mirrors else ""
+
+            outputs_dict[m["name"]]["scale_filter"] = None
+            outputs_dict[m["name"]]["modes"] = []
+            outputs_dict[m["name"]]["focused"] = m["focused"]
+            outputs_dict[m["name"]]["adaptive_sync_status"] = "enabled" if m["vrr"] else "disabled"
+
+            outputs_dict[m["name"]]["description"] = f'{m["description"]}'
+            outputs_dict[m["name"]]["x"] = int(m["x"])
+            outputs_dict[m["name"]]["y"] = int(m["y"])
+
+            outputs_dict[m["name"]]["refresh"] = round(m["refreshRate"], 2)
+
+            outputs_dict[m["name"]]["logical-width"] = m["width"] / m["scale"]
+            outputs_dict[m["name"]]["logical-height"] = m["height"] / m["scale"]
+
+            outputs_dict[m["name"]]["physical-width"] = m["width"]
+            outputs_dict[m["name"]]["physical-height"] = m["height"]
+
+            outputs_dict[m["name"]]["transform"] = transforms[m["transform"]]
+            outputs_dict[m["name"]]["scale"] = m["scale"]
+            outputs_dict[m["name"]]["focused"] = m["focused"]
+            outputs_dict[m["name"]]["dpms"] = m["dpmsStatus"]
+
+            for item in m["availableModes"]:
+                line = item[:-2]  # split "Hz"
+                w_h, r = line.split("@")
+                w, h = w_h.split("x")
+                try:
+                    outputs_dict[m["name"]]["modes"].append(
+                        {"width": int(w), "height": int(h), "refresh": float(r) * 1000})
+                except ValueError as e:
+                    eprint(e)
+
+            outputs_dict[m["name"]]["ten_bit"] = True if m["currentFormat"] in ["XRGB2101010", "XBGR2101010"] else False
+
+            outputs_dict[m["name"]]["make"] = m.get("make")
+            outputs_dict[m["name"]]["model"] = m["model"]
+            outputs_dict[m["name"]]["serial"] = m.get("serial")
+
+        return outputs_dict
+
+    @staticmethod
+    def watch_events(watcher):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        watcher.on_stop(lambda: HyprlandBackend._shutdown(sock))
+        sock.connect(get_hyprland_ipc().event_socket_path)
+        # e.g. "monitoradded>>DP-1", "monitorremoved>>DP-1"
+        for line in sock.makefile("r", encoding="utf-8"):
+            event, _, data = line.rstrip("\n").partition(">>")
+            if event == "monitoradded":
+                watcher.emit("added", data)
+            elif event == "monitorremoved":
+                watcher.emit("removed", data)
+            elif event == "configreloaded":
+                watcher.emit("changed")
+
+    @staticmethod
+    def _shutdown(sock):
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    @staticmethod
+    def apply_json(displays, use_desc, outputs_path, profile_data, cancelled=None):
+        print(f"[Profile] Applying {len(displays)} displays for Hyprland...")
+        targets = {d["name"]: target_from_display(d) for d in displays}
+        live = SettingsApplier.live_outputs()
+        changes = diff_outputs(targets, live)
+
+        layout = Layout.from_displays(displays)
+        lines = [SettingsApplier.get_header("Profile Loader")] + hyprland_config(layout, use_desc)
+        if changes:
+            keywords, dpms_cmds = HyprlandBackend._commands(layout, changes, use_desc)
+            HyprlandBackend._apply(lines, keywords, dpms_cmds, outputs_path, ApplyJournal(live, targets, changes))
+        else:
+            # The file may still differ, e.g. if it comes from another profile of the same layout
+            save_list_to_text_file(lines, outputs_path)
+            print("[Profile] Outputs already match the profile, nothing to apply")
+
+        config, config_file = get_config()
+
+        if "wallpapers" in profile_data and config.get(
+            "profile-bound-wallpapers", True
+        ):
+            if changes:
+                # Wallpaper daemons need the outputs to be configured already
+                wait_for_layout(targets, cancelled=cancelled)
+            # Wallpapers of the previous profile must be saved before we replace them
+            SettingsApplier.wait_for_saved_state()
+            print("[Profile] Applying wallpapers...")
+            WallpaperManager.apply_wallpapers(profile_data["wallpapers"], cancelled)
+
+    @staticmethod
+    def apply_gui(display_buttons, outputs_activity, outputs_path, use_desc, create_confirm_win_callback,
+                  config_dir=None, profile_name=None):
+        targets = {}
+        for db in display_buttons:
+            targets[db.name] = target_from_button(db, is_active(db, outputs_activity))
+        live = SettingsApplier.live_outputs()
+        changes = diff_outputs(targets, live)
+        lines = [SettingsApplier.get_header()] + hyprland_config(display_buttons, use_desc, outputs_activity)
+        if not changes:
+            # Still written, e.g. to create it on first use, or to switch to/from output descriptions
+            save_list_to_text_file(lines, outputs_path)
+            print("[Apply] Outputs already match the settings, nothing to apply")
+            return
+
+        keywords, dpms_cmds = HyprlandBackend._commands(display_buttons, changes, use_desc, outputs_activity)
+
+        journal = ApplyJournal(live, targets, changes)
+        HyprlandBackend._apply(lines, keywords, dpms_cmds, outputs_path, journal)
+
+        if create_confirm_win_callback:
+            create_confirm_win_callback(journal, config_dir, profile_name)
+
+    @staticmethod
+    def _commands(outputs, changes, use_desc, activity=None):
+        """Returns `keyword monitor` commands of the changed outputs, and dpms dispatches they need."""
+        keywords = []
+        dpms_cmds = []
+        for o in outputs:
+            changed = changes.get(o.name, set())
+            if changed:
+                keywords.append(hyprland_keyword(o, use_desc, activity))
+            if not is_active(o, activity):
+                if changed:
+                    dpms_cmds.append(f"dispatch dpms off {o.name}")
+            elif "dpms" in changed or "active" in changed:
+                cmd = "on" if o.dpms else "off"
+                dpms_cmds.append(f"dispatch dpms {cmd} {o.name}")
+
+        return keywords, dpms_cmds
+
+    @staticmethod
+    def rollback(journal):
+        states, complete = journal.inverse()
+        keywords, dpms_cmds = HyprlandBackend._commands(states.values(), journal.changes, False)
+        if HyprlandBackend._autoreload() and any(record.changed for record in journal.files):
+            # Restoring monitors.conf will make Hyprland re-read it; don't apply the old rules twice
+            if dpms_cmds:
+                HyprlandBackend.send(dpms_cmds)
+            return True
+        if not keywords:
+            return complete
+
+        reply = HyprlandBackend.send(keywords + dpms_cmds)
+        return complete and reply is not None and HyprlandBackend._reply_ok(reply)
+
+    @staticmethod
+    def reload():
+        HyprlandBackend.send(["reload"])
+
+    @staticmethod
+    def _apply(lines, keywords, dpms_cmds, outputs_path, journal):
+        """
+        Applies the changed monitor rules once. If Hyprland's autoreload is on, writing monitors.conf makes it
+        re-read the config anyway, so pushing the rules live as well would apply everything twice: we just write
+        the file then. Otherwise we push the rules live with batched `keyword monitor` commands, and only then
+        persist them, so that the file and the live state match.
+        Falls back to reloading the whole Hyprland config, if live apply is off or failed.
+        """
+        autoreload = HyprlandBackend._autoreload()
+        if autoreload and journal.save_file(save_list_to_text_file, lines, outputs_path):
+            # Hyprland re-reads the changed file by itself
+            if dpms_cmds:
+                HyprlandBackend.send(dpms_cmds)
+                journal.sent(dpms_cmds)
+            return
+
+        # Unless autoreload is off, the file is already in place here (and unchanged)
+        config, _ = get_config()
+        if config.get("live-apply", True) and keywords:
+            reply = HyprlandBackend.send(keywords + dpms_cmds)
+            journal.sent(keywords + dpms_cmds)
+            if reply is not None and HyprlandBackend._reply_ok(reply):
+                if not autoreload:
+                    journal.save_file(save_list_to_text_file, lines, outputs_path)
+                return
+            print(f"[Hyprland] Live apply failed ({reply}), falling back to config reload")
+
+        if not autoreload:
+            journal.save_file(save_list_to_text_file, lines, outputs_path)
+        HyprlandBackend.send(dpms_cmds + ["reload"])
+        journal.sent(dpms_cmds + ["reload"])
+
+    @staticmethod
+    def _autoreload():
+        """Tells if Hyprland re-reads its config files when they change."""
+        try:
+            return not json.loads(hyprctl("j/getoption misc:disable_autoreload")).get("int", 0)
+        except (OSError, ValueError, AttributeError):
+            return False
+
+    @staticmethod
+    def _reply_ok(reply):
+        # Every successful command replies "ok"; a batch concatenates the replies.
+        return not reply.replace("ok", "").strip()
+
+    @staticmethod
+    def send(cmds):
+        """Sends all the commands to Hyprland in a single [[BATCH]] round trip."""
+        ipc = get_hyprland_ipc()
+        try:
+            reply = ipc.batch(cmds)
+        except OSError as e:
+            print(f"[Error] Failed to communicate with Hyprland: {e}")
+            return None
+        print(f"[Hyprland] {len(cmds)} command(s) sent in {ipc.last_latency * 1000:.1f} ms")
+
+        return reply
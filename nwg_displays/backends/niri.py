@@ -0,0 +1,249 @@
+import os
+
+from nwg_displays.backends.base import Backend
+from nwg_displays.generators import is_active, niri_config
+from nwg_displays.ipc.niri import NiriIpc, get_niri_ipc
+from nwg_displays.layout import Layout
+from nwg_displays.readiness import wait_for_layout
+from nwg_displays.settings_applier.apply_journal import ApplyJournal
+from nwg_displays.settings_applier.output_diff import diff_outputs, live_from_output, snap_to_listed_mode, \
+    target_from_button, target_from_display, niri_actions
+from nwg_displays.settings_applier.settings_applier import SettingsApplier
+from nwg_displays.tools import eprint, get_config, get_config_home, niri_reload_config, save_kdl_output, \
+    ensure_niri_config_include
+from nwg_displays.wallpaper_manager import WallpaperManager
+
+
+class NiriBackend(Backend):
+    name = "niri"
+
+    @staticmethod
+    def outputs_path():
+        return os.path.join(get_config_home(), "niri", "monitor.kdl")
+
+    @staticmethod
+    def query_outputs():
+        outputs_dict = {}
+        eprint("Running on niri")
+
+        try:
+            # {"Ok":{"Outputs":{"eDP-1":{...}}}}
+            data = get_niri_ipc().request("Outputs")
+
+            monitors_dict = None
+            if isinstance(data, dict):
+                if "Ok" in data and isinstance(data["Ok"], dict):
+                    monitors_dict = data["Ok"].get("Outputs")
+                elif "Err" in data:
+                    eprint(f"[niri] Error from compositor: {data['Err']}")
+                    return {}
+
+            if monitors_dict is None or not isinstance(monitors_dict, dict):
+                eprint(f"[niri] Unexpected response format: {data}")
+                return {}
+
+            # monitors_dict is a dict keyed by output name
+            transforms = {"Normal": "normal", "90": "90", "180": "180", "270": "270",
+                         "Flipped": "flipped", "Flipped90": "flipped-90",
+                         "Flipped180": "flipped-180", "Flipped270": "flipped-270"}
+
+            for name, mon in monitors_dict.items():
+                # Get current mode info; disabled outputs have neither current mode nor logical position
+                current_mode_idx = mon.get("current_mode")
+                modes_list = mon.get("modes", [])
+                if current_mode_idx is None:
+                    current_mode_idx = 0
+                current_mode = modes_list[current_mode_idx] if modes_list and current_mode_idx < len(modes_list) else {}
+
+                logical = mon.get("logical") or {}
+
+                # Store raw make/model for accurate matching (not just description)
+                raw_make = mon.get("make", "")
+                raw_model = mon.get("model", "")
+                raw_serial = mon.get("serial")
+
+                # Format description for backward compatibility
+                description = f'{raw_make} {raw_model} {raw_serial or ""}'.strip()
+
+                outputs_dict[name] = {
+                    "active": mon.get("logical") is not None,
+                    "dpms": True,
+                    "description": description,
+                    "x": int(logical.get("x", 0)),
+                    "y": int(logical.get("y", 0)),
+                    "logical-width": int(logical.get("width", 0)),
+                    "logical-height": int(logical.get("height", 0)),
+                    "physical-width": int(current_mode.get("width", 0)),
+                    "physical-height": int(current_mode.get("height", 0)),
+                    "transform": transforms.get(logical.get("transform", "Normal"), "normal"),
+                    "scale": float(logical.get("scale", 1.0)),
+                    "scale_filter": "linear",
+                    "refresh": round(float(current_mode.get("refresh_rate", 60000)) / 1000, 2),
+                    "modes": [],
+                    "focused": mon.get("is_focused", False),
+                    "adaptive_sync_status": "enabled" if mon.get("vrr_enabled", False) else "disabled",
+                    "mirror": "",
+                    "ten_bit": False,
+                    "monitor": None,
+                    "make": raw_make,
+                    "model": raw_model,
+                    "serial": raw_serial,
+                }
+
+                # Parse available modes
+                for mode in modes_list:
+                    try:
+                        outputs_dict[name]["modes"].append({
+                            "width": int(mode.get("width", 0)),
+                            "height": int(mode.get("height", 0)),
+                            "refresh": float(mode.get("refresh_rate", 60000)),
+                            "preferred": mode.get("is_preferred", False),
+                        })
+                    except:
+                        pass
+        except ValueError as e:
+            eprint(f"[niri] JSON decode error: {e}")
+            return {}
+        except Exception as e:
+            eprint(f"Error parsing niri outputs: {e}")
+            # Return empty dict if parsing fails
+            return {}
+
+        return outputs_dict
+
+    @staticmethod
+    def watch_events(watcher):
+        # The event stream monopolizes its connection, so it can't share the one used for requests.
+        ipc = NiriIpc()
+        watcher.on_stop(ipc.close)
+        # niri has no dedicated output events: outputs being plugged or unplugged move workspaces around,
+        # and a config reload may reconfigure them.
+        for event in ipc.event_stream():
+            if "WorkspacesChanged" in event or "ConfigLoaded" in event:
+                watcher.emit("changed")
+
+    @staticmethod
+    def apply_json(displays, use_desc, outputs_path, profile_data, cancelled=None):
+        """Apply niri configuration by writing monitor.kdl file"""
+        print(f"[Profile] Applying {len(displays)} displays for niri...")
+
+        targets = {d["name"]: NiriBackend._target(target_from_display(d)) for d in displays}
+        live = SettingsApplier.live_outputs()
+        changes = diff_outputs(targets, live)
+        lines = niri_config(Layout.from_displays(displays))
+        if changes:
+            NiriBackend._apply(lines, targets, outputs_path, ApplyJournal(live, targets, changes))
+        else:
+            # The file may still differ, e.g. if it comes from another profile of the same layout
+            NiriBackend._save(lines, outputs_path)
+            print("[Profile] Outputs already match the profile, nothing to apply")
+
+        config, config_file = get_config()
+
+        if "wallpapers" in profile_data and config.get(
+            "profile-bound-wallpapers", True
+        ):
+            if changes:
+                # Wallpaper daemons need the outputs to be configured already
+                wait_for_layout(targets, cancelled=cancelled)
+            # Wallpapers of the previous profile must be saved before we replace them
+            SettingsApplier.wait_for_saved_state()
+            print("[Profile] Applying wallpapers...")
+            WallpaperManager.apply_wallpapers(profile_data["wallpapers"], cancelled)
+
+    @staticmethod
+    def apply_gui(display_buttons, outputs_activity, outputs_path, use_desc, create_confirm_win_callback,
+                  config_dir=None, profile_name=None):
+        """Apply niri configuration from GUI by writing monitor.kdl file"""
+        print(f"[niri] Applying {len(display_buttons)} displays...")
+
+        targets = {}
+        for db in display_buttons:
+            targets[db.name] = NiriBackend._target(target_from_button(db, is_active(db, outputs_activity)))
+        live = SettingsApplier.live_outputs()
+        changes = diff_outputs(targets, live)
+        lines = niri_config(display_buttons, outputs_activity)
+        if not changes:
+            NiriBackend._save(lines, outputs_path)
+            print("[niri] Outputs already match the settings, nothing to apply")
+            return
+
+        journal = ApplyJournal(live, targets, changes)
+        NiriBackend._apply(lines, targets, outputs_path, journal)
+
+        if create_confirm_win_callback:
+            create_confirm_win_callback(journal, config_dir, profile_name)
+
+    @staticmethod
+    def rollback(journal):
+        states, complete = journal.inverse()
+        targets = {}
+        for name, state in states.items():
+            targets[name] = live_from_output(state)
+            # niri reports the refresh rate rounded, while the Mode action needs the exact listed one
+            snap_to_listed_mode(targets[name], state.modes)
+        return NiriBackend._send_actions(targets, journal.changes) and complete
+
+    @staticmethod
+    def reload():
+        niri_reload_config()
+
+    @staticmethod
+    def _apply(lines, targets, outputs_path, journal):
+        """
+        Configures the changed outputs at runtime through the niri socket, and writes monitor.kdl for persistence
+        only. Falls back to reloading the config file, if live apply is off or failed.
+        """
+        config, _ = get_config()
+        live_ok = False
+        if config.get("live-apply", True):
+            live_ok = NiriBackend._send_actions(targets, journal.changes, journal)
+
+        NiriBackend._save(lines, outputs_path, journal)
+
+        if not live_ok:
+            # Reload niri configuration
+            niri_reload_config()
+
+    @staticmethod
+    def _save(lines, outputs_path, journal=None):
+        """Writes monitor.kdl, recording it in the journal if given, and makes sure config.kdl includes it."""
+        # Save to monitor.kdl in KDL format; an unchanged file is not rewritten, so niri won't re-read it needlessly
+        if journal:
+            written = journal.save_file(save_kdl_output, lines, outputs_path)
+        else:
+            written = save_kdl_output(lines, outputs_path)
+        if not written:
+            print(f"[niri] {outputs_path} unchanged")
+
+        # Ensure config.kdl includes monitor.kdl
+        niri_config_dir = os.path.dirname(outputs_path)
+        ensure_niri_config_include(niri_config_dir, outputs_path)
+
+    @staticmethod
+    def _send_actions(targets, changes, journal=None):
+        """Sends OutputActions of the changed attributes of outputs. Returns True if niri applied all of them."""
+        ok = True
+        ipc = get_niri_ipc()
+        try:
+            for name in changes:
+                if name not in targets:
+                    continue
+                for action in niri_actions(targets[name], changes[name]):
+                    if journal:
+                        journal.sent([{"output": name, "action": action}])
+                    if not ipc.output_action(name, action):
+                        print(f"[niri] Failed to apply {action} to {name}")
+                        ok = False
+        except Exception as e:
+            print(f"[niri] Live apply failed: {e}")
+            ok = False
+
+        return ok
+
+    @staticmethod
+    def _target(target):
+        # We don't apply these on niri, so let's not compare them
+        target["mirror"] = None
+        target["ten_bit"] = None
+        return target
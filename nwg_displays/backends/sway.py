@@ -0,0 +1,132 @@
+import os
+
+from nwg_displays.backends.base import Backend
+from nwg_displays.generators import sway_config, sway_name
+from nwg_displays.ipc.sway import get_sway_ipc
+from nwg_displays.settings_applier.apply_journal import ApplyJournal
+from nwg_displays.settings_applier.output_diff import diff_outputs, live_from_output, millihertz, \
+    target_from_button, target_from_display, sway_command
+from nwg_displays.settings_applier.settings_applier import SettingsApplier
+from nwg_displays.tools import eprint, get_config_home, inactive_output_description, save_list_to_text_file
+
+
+class SwayBackend(Backend):
+    name = "sway"
+    azotebg_file = ".azotebg"
+
+    @staticmethod
+    def outputs_path():
+        return os.path.join(get_config_home(), "sway", "outputs")
+
+    @staticmethod
+    def query_outputs():
+        eprint("Running on sway")
+        return get_sway_ipc().list_outputs()
+
+    @staticmethod
+    def watch_events(watcher):
+        # Subscriptions need a connection of their own, as i3ipc blocks in main() while listening.
+        from i3ipc import Connection, Event
+        i3 = Connection()
+        watcher.on_stop(i3.main_quit)
+        i3.on(Event.OUTPUT, lambda conn, e: watcher.emit("changed"))
+        i3.main()
+
+    @staticmethod
+    def apply_json(displays, use_desc, outputs_path, profile_data, cancelled=None):
+        targets = {d["name"]: target_from_display(d) for d in displays}
+        changes = diff_outputs(targets, SettingsApplier.live_outputs())
+
+        cmds = []
+        for d in displays:
+            if d["name"] in changes:
+                name = d["description"] if use_desc else d["name"]
+                cmds.append(sway_command(name, targets[d["name"]], changes[d["name"]], d.get("custom_mode", False)))
+
+        if cmds:
+            SwayBackend.send(cmds)
+        else:
+            print("[Profile] Outputs already match the profile, nothing to apply")
+
+    @staticmethod
+    def apply_gui(display_buttons, outputs_activity, outputs_path, use_desc, create_confirm_win_callback,
+                  config_dir=None, profile_name=None):
+        live = SettingsApplier.live_outputs()
+        targets = {}
+        cmd_names = {}
+        disabled = []
+
+        for db in display_buttons:
+            targets[db.name] = target_from_button(db)
+            cmd_names[db.name] = sway_name(db, use_desc)
+        db_names = list(cmd_names.values())
+
+        for key in outputs_activity:
+            if key in targets:
+                continue
+            if not use_desc:
+                name = key
+            else:
+                name = live[key].description if key in live else inactive_output_description(key)
+            if name not in db_names:
+                disabled.append(name)
+                targets[key] = {"active": False}
+                cmd_names[key] = name
+
+        lines = [SettingsApplier.get_header()] + sway_config(display_buttons, use_desc, disabled)
+        custom_modes = {db.name: db.custom_mode for db in display_buttons}
+        changes = diff_outputs(targets, live)
+        cmds = []
+        for key in targets:
+            if key in changes:
+                cmds.append(sway_command(cmd_names[key], targets[key], changes[key], custom_modes.get(key, False)))
+
+        journal = ApplyJournal(live, targets, changes)
+        journal.save_file(save_list_to_text_file, lines, outputs_path)
+
+        if not cmds:
+            print("[Apply] Outputs already match the settings, nothing to send")
+            return
+
+        SwayBackend.send(cmds)
+        journal.sent(cmds)
+
+        if create_confirm_win_callback:
+            create_confirm_win_callback(journal, config_dir, profile_name)
+
+    @staticmethod
+    def rollback(journal):
+        states, complete = journal.inverse()
+        cmds = []
+        for name, state in states.items():
+            # Modes not listed by the output must have been set as custom ones
+            custom_mode = bool(state.modes) and state.modes.find(
+                state.physical_width, state.physical_height, millihertz(state.refresh), tolerance=10) is None
+            cmds.append(sway_command(name, live_from_output(state), journal.changes[name], custom_mode))
+
+        ok = SwayBackend.send(cmds) if cmds else True
+        return ok and complete
+
+    @staticmethod
+    def reload():
+        SwayBackend.send(["reload"])
+
+    @staticmethod
+    def send(cmds):
+        """
+        Sends all the commands to sway as a single transaction, and reports per-command failures.
+        Returns True if all the commands succeeded.
+        """
+        try:
+            results = get_sway_ipc().command_batch(cmds)
+        except Exception as e:
+            print(f"[Error] Failed to communicate with sway: {e}")
+            return False
+
+        ok = True
+        for cmd, success, error in results:
+            if not success:
+                print(f"[Error] '{cmd}': {error}")
+                ok = False
+
+        return ok
@@ -0,0 +1,265 @@
+"""
+Pure generators of the compositors' output configuration out of the layout model, and the matching parsers.
+
+Generators take OutputLayout objects, or anything exposing the same attributes (e.g. DisplayButtons), and return
+lists of lines, w/o the "Generated by" header. Parsers return display entries in the profile JSON format, so that
+Layout.from_displays() turns them back into the layout.
+"""
+
+HYPRLAND_TRANSFORMS = {
+    "normal": 0,
+    "90": 1,
+    "180": 2,
+    "270": 3,
+    "flipped": 4,
+    "flipped-90": 5,
+    "flipped-180": 6,
+    "flipped-270": 7,
+}
+
+
+def is_active(output, activity=None):
+    """Takes the GUI "name": is_active dictionary into account, if given. Outputs missing from it are active."""
+    if activity is None:
+        return output.active
+    return activity.get(output.name, True)
+
+
+def _display(name, **values):
+    display = {
+        "name": name,
+        "active": True,
+        "transform": "normal",
+        "scale": 1.0,
+        "mirror": "",
+        "ten_bit": False,
+        "adaptive_sync": False,
+        "dpms": True,
+        "custom_mode": False,
+    }
+    display.update(values)
+    return display
+
+
+def _mode(mode):
+    """Parses "1920x1080@60.0" or "1920x1080@60.0Hz" into physical_width, physical_height, refresh."""
+    size, _, refresh = mode.partition("@")
+    width, height = size.split("x")
+    refresh = refresh[:-2] if refresh.endswith("Hz") else refresh
+    return {"physical_width": int(width), "physical_height": int(height), "refresh": float(refresh or 60.0)}
+
+
+# sway
+
+def sway_name(output, use_desc=False):
+    return output.description if use_desc else output.name
+
+
+def sway_config(outputs, use_desc=False, disabled=(), activity=None):
+    """
+    Returns `output` blocks of active outputs, and `output "name" disable` lines of inactive ones, followed by those
+    of `disabled` names (outputs known by name only).
+    """
+    lines = []
+    for o in outputs:
+        if not is_active(o, activity):
+            lines.append('output "{}" disable'.format(sway_name(o, use_desc)))
+            continue
+
+        lines.append('output "%s" {' % sway_name(o, use_desc))
+
+        custom_mode_str = "--custom" if o.custom_mode else ""
+        lines.append("    mode {} {}x{}@{}Hz".format(custom_mode_str, o.physical_width, o.physical_height, o.refresh))
+        lines.append("    pos {} {}".format(o.x, o.y))
+        lines.append("    transform {}".format(o.transform))
+        lines.append("    scale {}".format(o.scale))
+        lines.append("    scale_filter {}".format(o.scale_filter))
+        lines.append("    adaptive_sync {}".format("on" if o.adaptive_sync else "off"))
+        lines.append("    dpms {}".format("on" if o.dpms else "off"))
+
+        lines.append("}")
+
+    for name in disabled:
+        lines.append('output "{}" disable'.format(name))
+
+    return lines
+
+
+def parse_sway_config(lines):
+    displays = []
+    current = None
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        if line.startswith("output "):
+            name = line[7:].rsplit(" ", 1)[0].strip().strip('"')
+            if line.endswith("{"):
+                current = _display(name)
+                displays.append(current)
+            elif line.endswith(" disable"):
+                displays.append(_display(name, active=False))
+            continue
+
+        if line == "}" or current is None:
+            current = None
+            continue
+
+        key, *values = line.split()
+        if key == "mode":
+            current["custom_mode"] = "--custom" in values
+            current.update(_mode(values[-1]))
+        elif key == "pos":
+            current["x"], current["y"] = int(values[0]), int(values[1])
+        elif key == "transform":
+            current["transform"] = values[0]
+        elif key == "scale":
+            current["scale"] = float(values[0])
+        elif key == "scale_filter":
+            current["scale_filter"] = values[0]
+        elif key == "adaptive_sync":
+            current["adaptive_sync"] = values[0] == "on"
+        elif key == "dpms":
+            current["dpms"] = values[0] == "on"
+
+    return displays
+
+
+# Hyprland
+
+def hyprland_name(output, use_desc=False):
+    if not use_desc:
+        return output.name
+    return "desc:{}".format(output.description.replace("#", "##"))
+
+
+def hyprland_monitor_rule(output, use_desc=False):
+    """Returns the `monitor=` rule of an active output, w/o transform."""
+    rule = "{},{}x{}@{},{}x{},{}".format(
+        hyprland_name(output, use_desc),
+        output.physical_width,
+        output.physical_height,
+        output.refresh,
+        output.x,
+        output.y,
+        output.scale,
+    )
+    if output.mirror:
+        rule += ",mirror,{}".format(output.mirror)
+    if output.ten_bit:
+        rule += ",bitdepth,10"
+
+    return rule
+
+
+def hyprland_keyword(output, use_desc=False, activity=None):
+    """Returns the `keyword monitor` command applying the whole rule of the output, transform included."""
+    if not is_active(output, activity):
+        return "keyword monitor {},disable".format(hyprland_name(output, use_desc))
+    return "keyword monitor {},transform,{}".format(
+        hyprland_monitor_rule(output, use_desc), HYPRLAND_TRANSFORMS.get(output.transform, 0)
+    )
+
+
+def hyprland_config(outputs, use_desc=False, activity=None):
+    lines = []
+    for o in outputs:
+        name = hyprland_name(o, use_desc)
+        if not is_active(o, activity):
+            lines.append("monitor={},disable".format(name))
+            continue
+
+        lines.append("monitor={}".format(hyprland_monitor_rule(o, use_desc)))
+        if o.transform != "normal":
+            lines.append("monitor={},transform,{}".format(name, HYPRLAND_TRANSFORMS.get(o.transform, 0)))
+
+    return lines
+
+
+def parse_hyprland_config(lines):
+    transforms = {code: name for name, code in HYPRLAND_TRANSFORMS.items()}
+    displays = {}
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("monitor"):
+            continue
+
+        fields = [f.strip() for f in line.split("=", 1)[1].split(",")]
+        name = fields[0]
+        display = displays.setdefault(name, _display(name))
+        if fields[1] == "disable":
+            display["active"] = False
+        elif fields[1] == "transform":
+            display["transform"] = transforms.get(int(fields[2]), "normal")
+        else:
+            display.update(_mode(fields[1]))
+            x, y = fields[2].split("x")
+            display["x"], display["y"] = int(x), int(y)
+            display["scale"] = float(fields[3])
+            extras = fields[4:]
+            for i in range(0, len(extras) - 1, 2):
+                if extras[i] == "mirror":
+                    display["mirror"] = extras[i + 1]
+                elif extras[i] == "bitdepth":
+                    display["ten_bit"] = extras[i + 1] == "10"
+
+    return list(displays.values())
+
+
+# niri
+
+def niri_config(outputs, activity=None):
+    lines = []
+    for o in outputs:
+        lines.append('output "{}" {{'.format(o.name))
+        if not is_active(o, activity):
+            lines.append("    off")
+        else:
+            lines.append('    mode "{}x{}@{}"'.format(o.physical_width, o.physical_height, o.refresh))
+            lines.append("    scale {}".format(o.scale))
+            if o.transform != "normal":
+                lines.append('    transform "{}"'.format(o.transform))
+            lines.append("    position x={} y={}".format(o.x, o.y))
+            if o.adaptive_sync:
+                lines.append("    variable-refresh-rate")
+        lines.append("}")
+        lines.append("")
+
+    return lines
+
+
+def parse_niri_config(lines):
+    displays = []
+    current = None
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+
+        if line.startswith("output ") and line.endswith("{"):
+            current = _display(line[7:-1].strip().strip('"'))
+            displays.append(current)
+            continue
+
+        if line == "}" or current is None:
+            current = None
+            continue
+
+        key, _, value = line.partition(" ")
+        value = value.strip()
+        if key == "off":
+            current["active"] = False
+        elif key == "mode":
+            current.update(_mode(value.strip('"')))
+        elif key == "scale":
+            current["scale"] = float(value)
+        elif key == "transform":
+            current["transform"] = value.strip('"')
+        elif key == "position":
+            position = dict(item.split("=") for item in value.split())
+            current["x"], current["y"] = int(position["x"]), int(position["y"])
+        elif key == "variable-refresh-rate":
+            current["adaptive_sync"] = True
+
+    return displays
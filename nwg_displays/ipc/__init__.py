@@ -0,0 +1,30 @@
+import importlib
+
+from .events import OutputEventWatcher
+
+# Clients are imported on first access, so that a process only loads the one of the running compositor.
+_LAZY = {
+    "HyprlandIpc": "nwg_displays.ipc.hyprland",
+    "get_hyprland_ipc": "nwg_displays.ipc.hyprland",
+    "SwayIpc": "nwg_displays.ipc.sway",
+    "get_sway_ipc": "nwg_displays.ipc.sway",
+    "NiriIpc": "nwg_displays.ipc.niri",
+    "get_niri_ipc": "nwg_displays.ipc.niri",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "HyprlandIpc",
+    "get_hyprland_ipc",
+    "SwayIpc",
+    "get_sway_ipc",
+    "NiriIpc",
+    "get_niri_ipc",
+    "OutputEventWatcher",
+]
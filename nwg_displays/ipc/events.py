@@ -0,0 +1,80 @@
+import sys
+import threading
+import time
+
+from nwg_displays.backends import get_backend
+
+# Delay before reconnecting to the compositor, after the event stream ended: starts at FIRST_RETRY_DELAY,
+# doubles up to MAX_RETRY_DELAY (seconds). A stream which lasted STABLE_TIME resets the delay.
+FIRST_RETRY_DELAY = 0.1
+MAX_RETRY_DELAY = 5.0
+STABLE_TIME = 30.0
+
+
+class OutputEventWatcher:
+    """
+    Backend-neutral stream of output events. Listens in a daemon thread and calls `callback(kind, name)`, where
+    `kind` is one of "added", "removed" or "changed", and `name` is the output name if the compositor tells it.
+
+    The callback is called from the watcher thread; GUI code must hand it over to the main loop itself.
+    Events should be treated as hints: the receiver is expected to re-query the outputs and reconcile.
+    If the compositor closes the event stream (e.g. on restart), the watcher reconnects w/ backoff, and emits
+    "changed" then, as events might have been missed meanwhile.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self._thread = None
+        self._stop = threading.Event()
+        self._closers = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        backend = get_backend()
+        if backend is None:
+            return False
+
+        self._thread = threading.Thread(target=self._run, args=(backend.watch_events,), daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            closers, self._closers = self._closers, []
+        for close in closers:
+            close()
+
+    def on_stop(self, close):
+        """Registers a callable the backend uses to interrupt its blocking listener."""
+        with self._lock:
+            if not self._stop.is_set():
+                self._closers.append(close)
+                return
+        close()
+
+    def emit(self, kind, name=None):
+        if not self._stop.is_set():
+            self.callback(kind, name)
+
+    def _run(self, watch):
+        delay = FIRST_RETRY_DELAY
+        while not self._stop.is_set():
+            start = time.monotonic()
+            try:
+                watch(self)
+                reason = "event stream closed"
+            except Exception as e:
+                reason = e
+            with self._lock:
+                self._closers = []
+            if self._stop.is_set():
+                return
+
+            if time.monotonic() - start >= STABLE_TIME:
+                delay = FIRST_RETRY_DELAY
+            print(f"[Events] Output event watcher stopped: {reason}, reconnecting in {delay:.1f} s", file=sys.stderr)
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+            self.emit("changed")
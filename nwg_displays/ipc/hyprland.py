@@ -0,0 +1,70 @@
+import os
+import socket
+import time
+
+
+class HyprlandIpc:
+    """
+    Reusable client for Hyprland's request socket (.socket.sock).
+
+    Hyprland closes the request socket after every reply, so there is nothing to keep open between calls. What we
+    can reuse is the resolved socket path, and we can pack several commands into a single round trip with the
+    `[[BATCH]]` syntax.
+    """
+
+    def __init__(self, signature=None):
+        self.signature = signature or os.getenv("HYPRLAND_INSTANCE_SIGNATURE")
+        self.socket_path = self._resolve_socket_path(self.signature)
+        self.event_socket_path = os.path.join(os.path.dirname(self.socket_path), ".socket2.sock")
+        # Duration of the last round trip, in seconds
+        self.last_latency = 0.0
+
+    @staticmethod
+    def _resolve_socket_path(signature):
+        # /tmp/hypr moved to $XDG_RUNTIME_DIR/hypr in #5788
+        xdg_runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+        hypr_dir = f"{xdg_runtime_dir}/hypr" if xdg_runtime_dir and os.path.isdir(
+            f"{xdg_runtime_dir}/hypr") else "/tmp/hypr"
+
+        return f"{hypr_dir}/{signature}/.socket.sock"
+
+    def request(self, cmd):
+        """Sends a raw command and returns the whole reply, read until Hyprland closes the connection."""
+        start = time.perf_counter()
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(self.socket_path)
+            s.sendall(cmd.encode("utf-8"))
+            chunks = []
+            while True:
+                chunk = s.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            s.close()
+        self.last_latency = time.perf_counter() - start
+
+        return b"".join(chunks).decode("utf-8")
+
+    def batch(self, cmds):
+        """Sends several commands in a single round trip, e.g. ["dispatch dpms on DP-1", "reload"]."""
+        cmds = [cmd for cmd in cmds if cmd]
+        if not cmds:
+            return ""
+        if len(cmds) == 1:
+            return self.request(cmds[0])
+
+        return self.request("[[BATCH]]{}".format(";".join(cmds)))
+
+
+_instance = None
+
+
+def get_hyprland_ipc():
+    """Returns the shared client, so that the socket path is only resolved once per process."""
+    global _instance
+    if _instance is None:
+        _instance = HyprlandIpc()
+
+    return _instance
@@ -0,0 +1,114 @@
+import json
+import os
+import socket
+import threading
+
+
+class NiriIpc:
+    """
+    Client for the niri IPC socket ($NIRI_SOCKET). niri accepts any number of requests on a connection, one JSON
+    document per line, and replies with one line per request, so we keep a single connection open.
+
+    Replies are read into a growing buffer and decoded as soon as a complete document has arrived, which lets us
+    use the same reader for an open EventStream.
+    """
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or os.getenv("NIRI_SOCKET")
+        self._sock = None
+        self._buffer = bytearray()
+        # How much of the buffer we've already searched for the end of a document
+        self._scanned = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(self.socket_path)
+        self._buffer = bytearray()
+        self._scanned = 0
+
+    def close(self):
+        if self._sock:
+            try:
+                # Wakes up a thread blocked in recv(), e.g. reading an event stream
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+        self._sock = None
+
+    def _read_document(self):
+        while True:
+            end = self._buffer.find(b"\n", self._scanned)
+            if end >= 0:
+                line = bytes(self._buffer[:end])
+                del self._buffer[:end + 1]
+                self._scanned = 0
+                if line.strip():
+                    return json.loads(line)
+                continue
+
+            self._scanned = len(self._buffer)
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("connection closed by niri")
+            self._buffer += chunk
+
+    def request(self, request):
+        """Sends a request, e.g. "Outputs" or {"Output": {...}}, and returns the decoded reply."""
+        data = (json.dumps(request) + "\n").encode("utf-8")
+        with self._lock:
+            # Reconnect once, if niri closed the connection in the meantime
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(data)
+                    return self._read_document()
+                except (OSError, ConnectionError):
+                    self.close()
+                    if attempt:
+                        raise
+
+    def outputs(self):
+        """Returns the dict of outputs keyed by name, as reported by the "Outputs" request."""
+        reply = self.request("Outputs")
+        if not isinstance(reply, dict) or "Ok" not in reply:
+            raise RuntimeError(f"unexpected reply: {reply}")
+
+        return reply["Ok"]["Outputs"]
+
+    def output_action(self, output, action):
+        """
+        Configures an output at runtime, e.g. output_action("DP-1", {"Scale": {"scale": {"Specific": 1.5}}}).
+        Returns True if niri applied the change.
+        """
+        reply = self.request({"Output": {"output": output, "action": action}})
+        return isinstance(reply, dict) and reply.get("Ok") == {"OutputConfigChanged": "Applied"}
+
+    def event_stream(self):
+        """
+        Turns this connection into an event stream, and yields events as they come, e.g. {"WorkspacesChanged": {...}}.
+        No other requests may be sent on this connection afterwards; use a dedicated instance.
+        """
+        reply = self.request("EventStream")
+        if not isinstance(reply, dict) or "Ok" not in reply:
+            raise RuntimeError(f"niri refused the event stream: {reply}")
+
+        while self._sock is not None:
+            try:
+                yield self._read_document()
+            except ValueError:
+                continue
+
+
+_instance = None
+
+
+def get_niri_ipc():
+    """Returns the shared client, so that the whole process uses a single niri IPC connection."""
+    global _instance
+    if _instance is None:
+        _instance = NiriIpc()
+
+    return _instance
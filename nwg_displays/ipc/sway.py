@@ -0,0 +1,102 @@
+class SwayIpc:
+    """
+    Thin wrapper around a single, lazily opened i3ipc Connection.
+
+    The output model is built from one GET_OUTPUTS reply. It carries everything we need, inactive outputs included,
+    and, unlike get_tree(), its size does not depend on the number of windows.
+    """
+
+    def __init__(self):
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from i3ipc import Connection
+            self._connection = Connection()
+
+        return self._connection
+
+    def get_outputs(self):
+        return self.connection.get_outputs()
+
+    def get_tree(self):
+        return self.connection.get_tree()
+
+    def command(self, cmd):
+        return self.connection.command(cmd)
+
+    def command_batch(self, cmds):
+        """
+        Sends all the commands as a single `;`-joined message, so that sway receives the whole transaction at once.
+        Returns a list of (cmd, success, error) tuples, one per command.
+        """
+        cmds = [cmd.strip() for cmd in cmds if cmd and cmd.strip()]
+        if not cmds:
+            return []
+
+        replies = self.connection.command(";".join(cmds))
+        results = []
+        for i, cmd in enumerate(cmds):
+            if i < len(replies):
+                results.append((cmd, replies[i].success, replies[i].error))
+            else:
+                # sway stops parsing at the first command that failed
+                results.append((cmd, False, "not executed"))
+
+        return results
+
+    def list_outputs(self):
+        """Returns all the outputs known to sway, inactive included, as a dict keyed by output name."""
+        outputs_dict = {}
+        for item in self.get_outputs():
+            if item.name.startswith("__"):
+                continue
+            outputs_dict[item.name] = self._output_from_ipc_data(item.ipc_data)
+
+        return outputs_dict
+
+    @staticmethod
+    def _output_from_ipc_data(data):
+        # Inactive outputs come without current_mode, and with a zeroed rect; we fall back to the first listed mode.
+        modes = data.get("modes", [])
+        current_mode = data.get("current_mode") or (modes[0] if modes else {})
+        rect = data.get("rect") or {}
+        scale = data.get("scale")
+
+        return {
+            "x": rect.get("x", 0),
+            "y": rect.get("y", 0),
+            "logical-width": rect.get("width", 0),
+            "logical-height": rect.get("height", 0),
+            "physical-width": current_mode.get("width", 0),
+            "physical-height": current_mode.get("height", 0),
+            "active": data.get("active", False),
+            "dpms": data.get("dpms", data.get("power", True)),
+            "transform": data.get("transform") or "normal",
+            "scale": float(scale) if scale is not None and scale > 0 else 1.0,
+            "scale_filter": data.get("scale_filter"),
+            "adaptive_sync_status": data.get("adaptive_sync_status", "disabled"),
+            "refresh": current_mode["refresh"] / 1000 if "refresh" in current_mode else None,
+            "modes": modes,
+            "description": "{} {} {}".format(data.get("make"), data.get("model"), data.get("serial")),
+            "make": data.get("make"),
+            "model": data.get("model"),
+            "serial": data.get("serial"),
+            "focused": data.get("focused", False),
+            "mirror": "",  # We only use it on Hyprland
+            "ten_bit": False,  # We have no way to check it on sway
+            "monitor": None,
+        }
+
+
+_instance = None
+
+
+def get_sway_ipc():
+    """Returns the shared client, so that the whole process uses a single sway IPC connection."""
+    global _instance
+    if _instance is None:
+        _instance = SwayIpc()
+
+    return _instance
@@ -0,0 +1,229 @@
+"""
+Toolkit-independent model of the output layout: geometry and settings of outputs, snapping, and conversion
+from/to profile data. The GUI DisplayButtons observe their OutputLayout; the CLI may use the model directly.
+"""
+
+from bisect import bisect_left
+
+from nwg_displays.modes import ModeTable
+
+
+def is_rotated(transform):
+    return "90" in transform or "270" in transform
+
+
+class OutputLayout:
+    """Layout state of a single output."""
+
+    # Settings stored in profiles, in the order they are saved
+    PROFILE_KEYS = ("name", "description", "x", "y", "physical_width", "physical_height", "transform", "scale",
+                    "scale_filter", "refresh", "dpms", "adaptive_sync", "custom_mode", "mirror", "ten_bit", "active")
+
+    # Changing these affects the size of the output
+    SIZE_KEYS = {"physical_width", "physical_height", "transform", "scale"}
+
+    __slots__ = ("name", "description", "x", "y", "physical_width", "physical_height", "transform", "scale",
+                 "scale_filter", "refresh", "modes", "active", "dpms", "adaptive_sync", "custom_mode", "focused",
+                 "mirror", "ten_bit", "_observers")
+
+    def __init__(self, name, **kwargs):
+        self.name = name
+        self.description = ""
+        self.x = 0
+        self.y = 0
+        self.physical_width = 0
+        self.physical_height = 0
+        self.transform = "normal"
+        self.scale = 1.0
+        self.scale_filter = None
+        self.refresh = None
+        self.modes = ModeTable()
+        self.active = True
+        self.dpms = True
+        self.adaptive_sync = False
+        self.custom_mode = False
+        self.focused = False
+        self.mirror = ""
+        self.ten_bit = False
+        self._observers = []
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    @classmethod
+    def from_output(cls, output, custom_mode=False):
+        """Creates the layout of an OutputState reported by the compositor."""
+        layout = cls(output.name)
+        layout.update(**layout._output_values(output, custom_mode))
+        return layout
+
+    @staticmethod
+    def _output_values(output, custom_mode):
+        return {
+            "description": output.description,
+            "x": output.x,
+            "y": output.y,
+            "physical_width": round(output.physical_width),
+            "physical_height": round(output.physical_height),
+            "transform": output.transform,
+            "scale": output.scale,
+            "scale_filter": output.scale_filter,
+            "refresh": output.refresh,
+            "modes": output.modes,
+            "active": output.active,
+            "dpms": output.dpms,
+            "adaptive_sync": output.adaptive_sync,
+            "custom_mode": custom_mode,
+            "focused": output.focused,
+            "mirror": output.mirror,
+            "ten_bit": output.ten_bit,
+        }
+
+    def update_from_output(self, output, custom_mode=False):
+        self.update(**self._output_values(output, custom_mode))
+
+    @property
+    def logical_width(self):
+        if is_rotated(self.transform):
+            return self.physical_height / self.scale
+        else:
+            return self.physical_width / self.scale
+
+    @property
+    def logical_height(self):
+        if is_rotated(self.transform):
+            return self.physical_width / self.scale
+        else:
+            return self.physical_height / self.scale
+
+    def add_observer(self, callback):
+        """`callback(layout, changed_keys)` will be called after every update()."""
+        self._observers.append(callback)
+
+    def update(self, **values):
+        """Sets the given attributes and notifies observers about those that actually changed."""
+        changed = set()
+        for key, value in values.items():
+            if getattr(self, key) != value:
+                setattr(self, key, value)
+                changed.add(key)
+        # Outputs not reporting the current mode start from the native one
+        if not self.physical_width and self.modes.native is not None:
+            self.physical_width, self.physical_height, refresh = self.modes[self.modes.native]
+            self.refresh = refresh / 1000
+            changed.update(("physical_width", "physical_height", "refresh"))
+        if changed:
+            for callback in self._observers:
+                callback(self, changed)
+        return changed
+
+    def to_profile_dict(self):
+        return {key: getattr(self, key) for key in self.PROFILE_KEYS}
+
+    def update_from_profile(self, display):
+        """Applies a display entry of a profile JSON file."""
+        self.update(
+            transform=display.get("transform", "normal"),
+            physical_width=int(display.get("physical_width") or 0),
+            physical_height=int(display.get("physical_height") or 0),
+            scale=float(display.get("scale") or 1.0),
+            x=int(display.get("x") or 0),
+            y=int(display.get("y") or 0),
+            scale_filter=display.get("scale_filter", "linear"),
+            refresh=float(display.get("refresh") or 60.0),
+            dpms=display.get("dpms") if display.get("dpms") is not None else True,
+            adaptive_sync=display.get("adaptive_sync") if display.get("adaptive_sync") is not None else False,
+            custom_mode=display.get("custom_mode") if display.get("custom_mode") is not None else False,
+            mirror=display.get("mirror", ""),
+            ten_bit=display.get("ten_bit") if display.get("ten_bit") is not None else False,
+            active=display.get("active") if display.get("active") is not None else True,
+        )
+
+
+class Layout:
+    """Ordered collection of OutputLayout objects."""
+
+    def __init__(self, outputs=None):
+        self.outputs = list(outputs) if outputs else []
+
+    def __iter__(self):
+        return iter(self.outputs)
+
+    def __len__(self):
+        return len(self.outputs)
+
+    def get(self, name):
+        for output in self.outputs:
+            if output.name == name:
+                return output
+        return None
+
+    def add(self, output):
+        self.outputs.append(output)
+
+    def remove(self, output):
+        self.outputs.remove(output)
+
+    @classmethod
+    def from_displays(cls, displays):
+        """Builds the layout of the "displays" of a profile, e.g. to generate configs w/o the GUI."""
+        outputs = []
+        for display in displays:
+            output = OutputLayout(display["name"], description=display.get("description", ""))
+            output.update_from_profile(display)
+            outputs.append(output)
+        return cls(outputs)
+
+    def to_profile(self, config):
+        return {"displays": [output.to_profile_dict() for output in self.outputs], "config": config}
+
+    def apply_profile(self, profile_data):
+        """
+        Applies the "displays" of a profile. Outputs missing from the profile (e.g. newly connected) are placed
+        to the right of the profile ones, to avoid overlap. Returns the list of names found in the profile.
+        """
+        displays = {d["name"]: d for d in profile_data.get("displays", []) if "name" in d}
+
+        updated = []
+        for output in self.outputs:
+            if output.name in displays:
+                output.update_from_profile(displays[output.name])
+                updated.append(output.name)
+
+        max_x = 0
+        for output in self.outputs:
+            if output.name in updated:
+                max_x = max(max_x, output.x + output.logical_width)
+
+        current_x = max_x + 10
+        for output in self.outputs:
+            if output.name not in updated:
+                output.update(x=int(current_x), y=0)
+                current_x += output.logical_width + 10
+
+        return updated
+
+    def snap_edges(self, dragged_name, view_scale):
+        """
+        Returns sorted, deduplicated lists of the horizontal and vertical edges (in view coordinates) the dragged
+        output may snap to. Computed once at button press, so that motion events only need to bisect them.
+        """
+        snap_x, snap_y = {0}, {0}
+        for output in self.outputs:
+            if output.name == dragged_name:
+                continue
+            snap_x.add(output.x * view_scale)
+            snap_x.add((output.x + output.logical_width) * view_scale)
+            snap_y.add(output.y * view_scale)
+            snap_y.add((output.y + output.logical_height) * view_scale)
+
+        return sorted(snap_x), sorted(snap_y)
+
+
+def nearest_snap_edge(edges, value, threshold):
+    """Returns the edge from the sorted `edges` list nearest to `value`, if closer than `threshold`, or None."""
+    i = bisect_left(edges, value)
+    nearest = None
+    for edge in edges[max(i - 1, 0):i + 1]:
+        if abs(value - edge) < threshold and (nearest is None or abs(value - edge) < abs(value - nearest)):
+            nearest = edge
+    return nearest
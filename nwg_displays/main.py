@@ -14,16 +14,15 @@ Thank you, Kurt Jacobson!
 """
 
 import argparse
-import shutil
 import stat
 import sys
-import threading
 import gi
-from nwg_displays.settings_applier import SettingsApplier
+from nwg_displays.settings_applier import ApplyQueue, SettingsApplier
 from nwg_displays.wallpaper_manager import WallpaperManager
 
 
 gi.require_version("Gtk", "3.0")
+gi.require_version("Gdk", "3.0")
 try:
     gi.require_version("GtkLayerShell", "0.1")
 except ValueError:
@@ -36,16 +35,22 @@ except ValueError:
         + " ".join(sys.argv)
     )
 
-from gi.repository import Gtk, GLib, GtkLayerShell
+from gi.repository import Gtk, Gdk, GLib, GtkLayerShell
 
 from nwg_displays.tools import *
 from nwg_displays.profiles import ProfileManager
+from nwg_displays.layout import Layout, OutputLayout, nearest_snap_edge
+from nwg_displays.settings_applier.output_diff import millihertz
+from nwg_displays.ipc import OutputEventWatcher
+from nwg_displays.readiness import wait_for_activity, wait_for_layout
+from nwg_displays.backends import detect_backend, get_backend
 from nwg_displays.__about__ import __version__
 
 dir_name = os.path.dirname(__file__)
-sway = os.getenv("SWAYSOCK") is not None
-hypr = os.getenv("HYPRLAND_INSTANCE_SIGNATURE") is not None
-niri = os.getenv("NIRI_SOCKET") is not None
+backend = get_backend()
+sway = detect_backend() == "sway"
+hypr = detect_backend() == "hyprland"
+niri = detect_backend() == "niri"
 
 config_dir = os.path.join(get_config_home(), "nwg-displays")
 # This was done by mistake, and the config file need to be migrated to the proper path
@@ -96,19 +101,25 @@ outputs_path = ""
 num_ws = 0
 
 """
-i3.get_outputs() does not return some output attributes, especially when connected via hdmi.
-i3.get_tree() on the other hand does not return inactive outputs. So we'll list attributes with .get_tree(),
-and the add inactive outputs, if any, from what we detect with .get_outputs()
+On sway both dictionaries below are built from a single GET_OUTPUTS reply: the canvas only displays active outputs,
+while outputs_activity lists the inactive ones as well.
 """
 outputs = (
     {}
-)  # Active outputs, listed from the sway tree; stores name and all attributes.
+)  # Active outputs; "name": OutputState.
 outputs_activity = {}  # Just a dictionary "name": is_active - from get_outputs()
 workspaces = {}  # "workspace_num": "display_name"
 
 display_buttons = []
+layout = Layout()  # Models of display_buttons, in the same order
 selected_output_button = None
 profile_manager = None
+activity_check_buttons = {}  # "name": Gtk.CheckButton
+
+output_watcher = None
+refresh_pending = False
+apply_queue = ApplyQueue()  # Profile wallpapers, applied after confirmation; the latest request wins
+refresh_queue = ApplyQueue()  # Waits for the compositor before refreshing the canvas
 
 # Glade form fields
 form_name = None
@@ -142,8 +153,8 @@ src_tag = 0
 counter = 0
 
 """
-We need to rebuild the modes GtkComboBoxText on each DisplayButton click. Unfortunately appending an item fires the
-"change" event every time (and we have no "value-changed" event here). Setting `on_mode_changed_silent` True will 
+We need to swap the model of the modes GtkComboBoxText on each DisplayButton click. Unfortunately this fires the
+"change" event (and we have no "value-changed" event here). Setting `on_mode_changed_silent` True will
 prevent the `on_mode_changed` function from working.
 """
 on_mode_changed_silent = False
@@ -155,7 +166,9 @@ fixed = Gtk.Fixed()
 
 SENSITIVITY = 1
 
-EvMask = Gdk.EventMask.BUTTON_PRESS_MASK | Gdk.EventMask.BUTTON1_MOTION_MASK
+EvMask = (
+    Gdk.EventMask.BUTTON_PRESS_MASK | Gdk.EventMask.BUTTON_RELEASE_MASK | Gdk.EventMask.BUTTON1_MOTION_MASK
+)
 
 offset_x = 0
 offset_y = 0
@@ -163,6 +176,12 @@ px = 0
 py = 0
 max_x = 0
 max_y = 0
+# Sorted edges of the not dragged outputs, see on_button_press_event
+snap_x = [0]
+snap_y = [0]
+# Last pointer position not yet applied, and the frame clock callback to apply it, see on_motion_notify_event
+drag_pending = None
+drag_tick_id = 0
 
 voc = {}
 
@@ -228,6 +247,9 @@ def on_button_press_event(widget, event):
         max_y = round_down_to_multiple(
             p.get_allocation().height - widget.get_allocation().height, SENSITIVITY
         )
+        # Other outputs don't move during the drag: collect their edges once, not on every motion event
+        global snap_x, snap_y
+        snap_x, snap_y = layout.snap_edges(widget.name, config["view-scale"])
 
         update_form_from_widget(widget)
 
@@ -251,82 +273,90 @@ def on_motion_notify_event(widget, event):
     if x != px or y != py:
         px = x
         py = y
-        snap_x, snap_y = [0], [0]
-        # Collect snap lines from other displays
-        for db in display_buttons:
-            if db.name == widget.name:
-                continue
-
-            val = db.x * config["view-scale"]
-            if val not in snap_x:
-                snap_x.append(val)
-
-            val = (db.x + db.logical_width) * config["view-scale"]
-            if val not in snap_x:
-                snap_x.append(val)
-
-            val = db.y * config["view-scale"]
-            if val not in snap_y:
-                snap_y.append(val)
-
-            val = (db.y + db.logical_height) * config["view-scale"]
-            if val not in snap_y:
-                snap_y.append(val)
-
-        snap_h, snap_v = None, None
-        # Find nearest horizontal snap line
-        for value in snap_x:
-            if abs(x - value) < snap_threshold_scaled:
-                snap_h = value
-                break
-
-        for value in snap_x:
-            w = widget.logical_width * config["view-scale"]
-            if abs(w + x - value) < snap_threshold_scaled:
-                snap_h = value - w
-                break
-
-        # Find nearest vertical snap line
-        for value in snap_y:
-            if abs(y - value) < snap_threshold_scaled:
-                snap_v = value
-                break
-
-        for value in snap_y:
-            h = widget.logical_height * config["view-scale"]
-            if abs(h + y - value) < snap_threshold_scaled:
-                snap_v = value - h
-                break
-
-        # Just in case ;)
-        if snap_h and snap_h < 0:
-            snap_h = 0
-
-        if snap_v and snap_v < 0:
-            snap_v = 0
-
-        if snap_h is None and snap_v is None:
-            fixed.move(widget, x, y)
-            widget.x = round(x / config["view-scale"])
+        # Pointer events may come several times per frame: only remember the last position, and move the widget
+        # once per frame, from the frame clock tick.
+        global drag_pending, drag_tick_id
+        drag_pending = (x, y)
+        if not drag_tick_id:
+            drag_tick_id = widget.add_tick_callback(on_drag_tick)
+
+
+def on_drag_tick(widget, frame_clock):
+    global drag_tick_id
+    drag_tick_id = 0
+    flush_drag(widget)
+    return GLib.SOURCE_REMOVE
+
+
+def flush_drag(widget):
+    global drag_pending
+    if drag_pending is None:
+        return
+    x, y = drag_pending
+    drag_pending = None
+
+    snap_h, snap_v = None, None
+    # Find nearest horizontal snap line
+    edge = nearest_snap_edge(snap_x, x, snap_threshold_scaled)
+    if edge is not None:
+        snap_h = edge
+
+    w = widget.logical_width * config["view-scale"]
+    edge = nearest_snap_edge(snap_x, w + x, snap_threshold_scaled)
+    if edge is not None:
+        snap_h = edge - w
+
+    # Find nearest vertical snap line
+    edge = nearest_snap_edge(snap_y, y, snap_threshold_scaled)
+    if edge is not None:
+        snap_v = edge
+
+    h = widget.logical_height * config["view-scale"]
+    edge = nearest_snap_edge(snap_y, h + y, snap_threshold_scaled)
+    if edge is not None:
+        snap_v = edge - h
+
+    # Just in case ;)
+    if snap_h and snap_h < 0:
+        snap_h = 0
+
+    if snap_v and snap_v < 0:
+        snap_v = 0
+
+    if snap_h is None and snap_v is None:
+        fixed.move(widget, x, y)
+        widget.x = round(x / config["view-scale"])
+        widget.y = round(y / config["view-scale"])
+    else:
+
+        if snap_h is not None and snap_v is not None:
+            fixed.move(widget, snap_h, snap_v)
+            widget.x = round(snap_h / config["view-scale"])
+            widget.y = round(snap_v / config["view-scale"])
+
+        elif snap_h is not None:
+            fixed.move(widget, snap_h, y)
+            widget.x = round(snap_h / config["view-scale"])
             widget.y = round(y / config["view-scale"])
-        else:
 
-            if snap_h is not None and snap_v is not None:
-                fixed.move(widget, snap_h, snap_v)
-                widget.x = round(snap_h / config["view-scale"])
-                widget.y = round(snap_v / config["view-scale"])
+        elif snap_v is not None:
+            fixed.move(widget, x, snap_v)
+            widget.x = round(x / config["view-scale"])
+            widget.y = round(snap_v / config["view-scale"])
 
-            elif snap_h is not None:
-                fixed.move(widget, snap_h, y)
-                widget.x = round(snap_h / config["view-scale"])
-                widget.y = round(y / config["view-scale"])
+    # During the drag only the position changes, the rest of the form is refreshed on button release.
+    form_x.set_value(widget.x)
+    form_y.set_value(widget.y)
 
-            elif snap_v is not None:
-                fixed.move(widget, x, snap_v)
-                widget.x = round(x / config["view-scale"])
-                widget.y = round(snap_v / config["view-scale"])
 
-    update_form_from_widget(widget)
+def on_button_release_event(widget, event):
+    if event.button == 1:
+        global drag_tick_id
+        if drag_tick_id:
+            widget.remove_tick_callback(drag_tick_id)
+            drag_tick_id = 0
+        flush_drag(widget)
+        update_form_from_widget(widget)
 
 
 def update_form_from_widget(widget):
@@ -353,94 +383,44 @@ def update_form_from_widget(widget):
     form_refresh.set_value(widget.refresh)
     if form_ten_bit:
         form_ten_bit.set_active(widget.ten_bit)
-    if form_mirror:
-        form_mirror.remove_all()
-        form_mirror.append("", voc["none"])
-        for key in outputs:
-            if key != widget.name:
-                form_mirror.append(key, key)
-        form_mirror.set_active_id(widget.mirror)
-        form_mirror.show_all()
 
     global on_mode_changed_silent
     on_mode_changed_silent = True
 
-    form_modes.remove_all()
-    active = ""
-    for mode in widget.modes:
-        m = "{}x{}@{}Hz".format(
-            mode["width"],
-            mode["height"],
-            mode["refresh"] / 1000,
-            mode["refresh"] / 1000,
-            widget.refresh,
-        )
-        form_modes.append(m, m)
-        # This is just to set active_id
+    if form_mirror:
+        if widget.mirror_model is None:
+            widget.set_mirror_candidates(outputs)
+        form_mirror.set_model(widget.mirror_model)
+        form_mirror.set_active_id(widget.mirror)
 
-        if (
-            mode["width"] == widget.physical_width
-            and mode["height"] == widget.physical_height
-            and mode["refresh"] / 1000 == widget.refresh
-        ):
-            active = m
-    if active:
-        form_modes.set_active_id(active)
+    form_modes.set_model(widget.modes_model)
+    # Some compositors round the refresh rate they report, e.g. Hyprland to 2 decimal places
+    i = widget.modes.find(widget.physical_width, widget.physical_height, millihertz(widget.refresh), tolerance=10)
+    if i is not None:
+        form_modes.set_active(i)
 
     form_transform.set_active_id(widget.transform)
 
     on_mode_changed_silent = False
 
 
+def _layout_property(key):
+    return property(lambda self: getattr(self.layout, key), lambda self, value: setattr(self.layout, key, value))
+
+
 class DisplayButton(Gtk.Button):
-    def __init__(
-        self,
-        name,
-        description,
-        x,
-        y,
-        physical_width,
-        physical_height,
-        transform,
-        scale,
-        scale_filter,
-        refresh,
-        modes,
-        active,
-        dpms,
-        adaptive_sync_status,
-        ten_bit,
-        custom_mode_status,
-        focused,
-        monitor,
-        mirror="",
-    ):
+    """
+    Canvas representation of an OutputLayout. Output properties are delegated to the model, and the button
+    follows its changes.
+    """
+
+    def __init__(self, layout, monitor):
         super().__init__()
-        # Output properties
-        self.name = name
-        self.description = description
-        self.x = x
-        self.y = y
-        self.physical_width = physical_width
-        self.physical_height = physical_height
-        self.transform = transform
-        self.scale = scale
-        self.scale_filter = scale_filter
-        self.refresh = refresh
-        self.modes = []
-        for m in modes:
-            if m not in self.modes:
-                self.modes.append(m)
-        # self.modes = modes
-        self.active = active
-        self.dpms = dpms
-        self.adaptive_sync = (
-            adaptive_sync_status == "enabled"
-        )  # converts "enabled | disabled" to bool
-        self.custom_mode = custom_mode_status
-        self.focused = focused
-        self.mirror = mirror
-        self.ten_bit = ten_bit
+        self.layout = layout
+        self.name = layout.name
+        self.mirror_model = None
+        self.build_modes_model()
+        layout.add_observer(self.on_layout_changed)
 
         # Button properties
         self.selected = False
@@ -448,6 +428,7 @@ class DisplayButton(Gtk.Button):
         self.set_events(EvMask)
         self.connect("button_press_event", on_button_press_event)
         self.connect("motion_notify_event", on_motion_notify_event)
+        self.connect("button_release_event", on_button_release_event)
         self.set_always_show_image(True)
         self.set_label(self.name)
 
@@ -456,7 +437,7 @@ class DisplayButton(Gtk.Button):
 
         self.indicator = Indicator(
             monitor,
-            name,
+            self.name,
             round(self.physical_width * config["view-scale"]),
             round(self.physical_height * config["view-scale"]),
             config["indicator-timeout"],
@@ -464,19 +445,63 @@ class DisplayButton(Gtk.Button):
 
         self.show()
 
+    description = _layout_property("description")
+    x = _layout_property("x")
+    y = _layout_property("y")
+    physical_width = _layout_property("physical_width")
+    physical_height = _layout_property("physical_height")
+    transform = _layout_property("transform")
+    scale = _layout_property("scale")
+    scale_filter = _layout_property("scale_filter")
+    refresh = _layout_property("refresh")
+    modes = _layout_property("modes")
+    active = _layout_property("active")
+    dpms = _layout_property("dpms")
+    adaptive_sync = _layout_property("adaptive_sync")
+    custom_mode = _layout_property("custom_mode")
+    focused = _layout_property("focused")
+    mirror = _layout_property("mirror")
+    ten_bit = _layout_property("ten_bit")
+
     @property
     def logical_width(self):
-        if is_rotated(self.transform):
-            return self.physical_height / self.scale
-        else:
-            return self.physical_width / self.scale
+        return self.layout.logical_width
 
     @property
     def logical_height(self):
-        if is_rotated(self.transform):
-            return self.physical_width / self.scale
-        else:
-            return self.physical_height / self.scale
+        return self.layout.logical_height
+
+    def update_from_output(self, item, custom_mode):
+        self.layout.update_from_output(item, custom_mode)
+        self.indicator.set_monitor(item.monitor)
+
+    def on_layout_changed(self, layout, changed):
+        if "modes" in changed:
+            self.build_modes_model()
+        if changed & OutputLayout.SIZE_KEYS:
+            self.rescale_transform()
+        if "x" in changed or "y" in changed:
+            parent = self.get_parent()
+            if parent:
+                parent.move(self, round(self.x * config["view-scale"]), round(self.y * config["view-scale"]))
+
+    def build_modes_model(self):
+        """
+        Prebuilds the model of the Modes combo box out of the ModeTable of the output, so that selecting
+        the output only swaps the model.
+        """
+        self.modes_model = Gtk.ListStore(str, str)
+        for i in range(len(self.modes)):
+            label = self.modes.label(i)
+            self.modes_model.append([label, label])
+
+    def set_mirror_candidates(self, names):
+        """Prebuilds the model of the Mirror combo box: "none" plus all other outputs."""
+        self.mirror_model = Gtk.ListStore(str, str)
+        self.mirror_model.append([voc["none"], ""])
+        for name in names:
+            if name != self.name:
+                self.mirror_model.append([name, name])
 
     def select(self):
         self.selected = True
@@ -614,10 +639,10 @@ def on_refresh_changed(widget):
 
 def on_mode_changed(widget):
     if selected_output_button and not on_mode_changed_silent:
-        mode = selected_output_button.modes[widget.get_active()]
-        selected_output_button.physical_width = mode["width"]
-        selected_output_button.physical_height = mode["height"]
-        selected_output_button.refresh = mode["refresh"] / 1000
+        width, height, refresh = selected_output_button.modes[widget.get_active()]
+        selected_output_button.physical_width = width
+        selected_output_button.physical_height = height
+        selected_output_button.refresh = refresh / 1000
         selected_output_button.rescale_transform()
 
         update_form_from_widget(selected_output_button)
@@ -637,7 +662,9 @@ def on_apply_button(widget, p_manager=None):
     if "active-profile" in config:
         del config["active-profile"]
 
-    SettingsApplier.apply_from_gui(
+    # Wallpapers of the previous apply, if not set yet, are outdated now
+    apply_queue.cancel()
+    applied = SettingsApplier.apply_from_gui(
         display_buttons,
         outputs_activity,
         outputs_path,
@@ -646,6 +673,9 @@ def on_apply_button(widget, p_manager=None):
         config_dir,
         profile_name=profile_name,
     )
+    if not applied:
+        notify(voc.get("apply-busy", "Busy"),
+               voc.get("apply-busy-message", "Another profile is being applied, try again in a moment"))
     # save config file
     save_json(config, os.path.join(config_dir, "config"))
 
@@ -654,65 +684,212 @@ def on_output_toggled(check_btn, name):
     outputs_activity[name] = check_btn.get_active()
 
 
-def on_toggle_button(btn):
-    i3 = Connection()
+def on_sway_toggle_button(btn):
+    # The "Toggle" button only exists on sway: other compositors turn outputs on/off on Apply
+    from nwg_displays.backends.sway import SwayBackend
+    cmds = []
     for key in outputs_activity:
         toggle = "enable" if outputs_activity[key] else "disable"
-        cmd = "output {} {}".format(key, toggle)
-        i3.command(cmd)
+        cmds.append("output {} {}".format(key, toggle))
+    SwayBackend.send(cmds)
+
+    refresh_when_ready(wait_for_activity, dict(outputs_activity))
+
+
+def refresh_when_ready(wait, *args):
+    """Refreshes the canvas once `wait(*args)` from the readiness module returns, w/o blocking the GUI."""
+    refresh_queue.submit(wait_and_refresh, wait, *args)
+
 
-    # If the output has just been turned back on, Gdk.Display.get_default() may need some time
-    GLib.timeout_add(1000, create_display_buttons)
+def wait_and_refresh(wait, *args, cancelled=None):
+    wait(*args, cancelled=cancelled)
+    # A newer request will refresh on its own
+    if not cancelled():
+        GLib.idle_add(refresh_display_buttons)
 
 
-def create_display_buttons():
-    global display_buttons
-    for item in display_buttons:
-        item.destroy()
-    display_buttons = []
+def list_outputs():
+    """
+    Returns {"name": OutputState} of outputs to be displayed on the canvas, with Gdk.Monitor assigned.
+    Matching outputs to Gdk monitors belongs here: tools, the applier and the scripts must work without gi.
+    """
+    snapshot = query_outputs()
 
-    outputs = list_outputs()
-    
-    if not outputs:
+    if sway:
+        # Inactive outputs are not displayed on the canvas; on sway we only list them in outputs_activity.
+        outputs_dict = snapshot.active()
+    else:
+        outputs_dict = dict(snapshot.items())
+
+    # We used to assign Gdk.Monitor to output on the basis of x and y coordinates, but it no longer works,
+    # starting from gtk3-1:3.24.42: all monitors have x=0, y=0. This is most likely a bug, but from now on
+    # we must rely on gdk monitors order.
+    # For niri, we use property-based matching to avoid order issues after config reload.
+    monitors = []
+    display = Gdk.Display.get_default()
+    for i in range(display.get_n_monitors()):
+        monitor = display.get_monitor(i)
+        monitors.append(monitor)
+
+    if niri:
+        # Niri: Use position-based matching with Gdk.Monitor geometry
+        # This ensures correct matching even when multiple monitors have identical properties
+        for key in outputs_dict:
+            if key in outputs_dict:
+                data = outputs_dict[key]
+                output_x = data.x
+                output_y = data.y
+                
+                # Find matching monitor by position (x, y coordinates)
+                matched = False
+                for m in monitors:
+                    try:
+                        geom = m.get_geometry()
+                        gdk_x = geom.x
+                        gdk_y = geom.y
+                        # Check if positions match (allow small tolerance)
+                        if abs(gdk_x - output_x) < 10 and abs(gdk_y - output_y) < 10:
+                            outputs_dict[key].monitor = m
+                            matched = True
+                            break
+                    except:
+                        pass
+                
+                # Fallback to index-based if position matching fails
+                if not matched:
+                    idx = 0
+                    for k in outputs_dict:
+                        if k == key:
+                            break
+                        idx += 1
+                    if idx < len(monitors):
+                        outputs_dict[key].monitor = monitors[idx]
+    else:
+        # Sway/Hyprland: Keep original index-based matching
+        idx = 0
+        for key in outputs_dict:
+            try:
+                outputs_dict[key].monitor = monitors[idx]
+            except IndexError:
+                print(f"Couldn't assign a Gdk.Monitor to {outputs_dict[key]}")
+            idx += 1
+
+    for key in outputs_dict:
+        eprint(key, outputs_dict[key])
+    return outputs_dict
+
+
+def refresh_display_buttons(force=False):
+    """
+    Synchronizes the canvas with the outputs currently reported by the compositor. Buttons of outputs that went away
+    are removed, new outputs get their buttons, and the existing ones are updated in place, but only if the
+    compositor state of their output changed since the last refresh: otherwise the user's unapplied edits are kept.
+    `force` updates all of them, e.g. to show the settings just restored.
+    """
+    global outputs, refresh_pending
+    refresh_pending = False
+
+    current = list_outputs()
+
+    if not current:
         eprint("[Error] No outputs detected")
         return
-    
+
+    previous, outputs = outputs, current
+
+    for db in display_buttons[:]:
+        if db.name not in outputs:
+            display_buttons.remove(db)
+            layout.remove(db.layout)
+            db.indicator.destroy()
+            db.destroy()
+
+    existing = {db.name: db for db in display_buttons}
     for key in outputs:
         item = outputs[key]
         custom_mode = key in config["custom-mode"]
-        b = DisplayButton(
-            key,
-            item["description"],
-            item["x"],
-            item["y"],
-            round(item["physical-width"]),
-            round(item["physical-height"]),
-            item["transform"],
-            item["scale"],
-            item["scale_filter"],
-            item["refresh"],
-            item["modes"],
-            item["active"],
-            item["dpms"],
-            item["adaptive_sync_status"],
-            item["ten_bit"],
-            custom_mode,
-            item["focused"],
-            item["monitor"],
-            mirror=item["mirror"],
-        )
+        if key in existing:
+            if force or key not in previous or not previous[key].same_config(item):
+                # The button follows its model
+                existing[key].update_from_output(item, custom_mode)
+            else:
+                existing[key].indicator.set_monitor(item.monitor)
+            continue
+
+        b = DisplayButton(OutputLayout.from_output(item, custom_mode), item.monitor)
 
         display_buttons.append(b)
+        layout.add(b.layout)
 
         fixed.put(
             b,
-            round(item["x"] * config["view-scale"]),
-            round(item["y"] * config["view-scale"]),
+            round(b.x * config["view-scale"]),
+            round(b.y * config["view-scale"]),
         )
 
+    for db in display_buttons:
+        db.set_mirror_candidates(outputs)
+
     if display_buttons:
-        display_buttons[0].select()
-        update_form_from_widget(display_buttons[0])
+        if selected_output_button not in display_buttons:
+            for db in display_buttons:
+                db.unselect()
+            display_buttons[0].select()
+        update_form_from_widget(selected_output_button)
+
+    # On startup the check buttons are created by main(), right after their label.
+    if activity_check_buttons:
+        refresh_activity_check_buttons()
+
+
+def on_profile_loaded():
+    # The profile may come with a different view scale
+    for db in display_buttons:
+        db.rescale_transform()
+        fixed.move(db, round(db.x * config["view-scale"]), round(db.y * config["view-scale"]))
+    if selected_output_button:
+        update_form_from_widget(selected_output_button)
+
+
+def refresh_activity_check_buttons():
+    """Adds check buttons for outputs that just appeared, and removes those of outputs that are gone."""
+    current = list_outputs_activity()
+
+    for key in list(activity_check_buttons):
+        if key not in current:
+            activity_check_buttons.pop(key).destroy()
+            outputs_activity.pop(key, None)
+
+    position = None
+    for key in current:
+        if key in activity_check_buttons:
+            position = form_wrapper_box.child_get_property(activity_check_buttons[key], "position")
+            continue
+        outputs_activity[key] = current[key]
+        cb = Gtk.CheckButton()
+        cb.set_label(key)
+        cb.set_active(current[key])
+        cb.connect("toggled", on_output_toggled, key)
+        form_wrapper_box.pack_start(cb, False, False, 3)
+        if position is not None:
+            position += 1
+            form_wrapper_box.reorder_child(cb, position)
+        cb.show()
+        activity_check_buttons[key] = cb
+
+
+def on_output_event(kind, name):
+    # Called from the watcher thread; coalesce bursts of events into a single refresh on the main loop.
+    global refresh_pending
+    invalidate_outputs()
+    if not refresh_pending:
+        refresh_pending = True
+        GLib.idle_add(refresh_display_buttons)
+
+
+def on_monitor_changed(display, monitor):
+    # Gdk.Monitor objects are assigned to outputs by order, so they must be matched again.
+    on_output_event("changed", None)
 
 
 class Indicator(Gtk.Window):
@@ -738,6 +915,11 @@ class Indicator(Gtk.Window):
         if self.timeout > 0:
             self.show_up(self.timeout * 2)
 
+    def set_monitor(self, monitor):
+        if monitor and monitor != self.monitor:
+            self.monitor = monitor
+            GtkLayerShell.set_monitor(self, monitor)
+
     def show_up(self, timeout=None):
         if self.timeout > 0 and self.monitor:
             self.show_all()
@@ -781,7 +963,7 @@ def create_workspaces_window(btn):
             if not config["use-desc"]:
                 combo.append(key, key)
             else:
-                desc = "{}".format(outputs[key]["description"])
+                desc = "{}".format(outputs[key].description)
                 combo.append(desc, desc)
             if i + 1 in workspaces:
                 combo.set_active_id(workspaces[i + 1])
@@ -847,7 +1029,7 @@ def create_workspaces_window_hypr(btn):
             if not config["use-desc"]:
                 combo.append(key, key)
             else:
-                desc = "{}".format(outputs[key]["description"])
+                desc = "{}".format(outputs[key].description)
                 combo.append(desc, desc)
             if i + 1 in workspaces:
                 combo.set_active_id(workspaces[i + 1])
@@ -889,21 +1071,18 @@ def close_dialog(w, win):
 
 def on_workspaces_apply_btn(w, win, old_workspaces):
     if workspaces != old_workspaces:
-        save_workspaces(
+        if save_workspaces(
             workspaces,
             os.path.join(sway_config_dir, "workspaces"),
             use_desc=config["use-desc"],
-        )
-        notify("Workspaces assignment", "Restart sway for changes to take effect")
+        ):
+            notify("Workspaces assignment", "Restart sway for changes to take effect")
 
     close_dialog(w, win)
 
 
 def on_workspaces_apply_btn_hypr(w, win, old_workspaces):
     if workspaces != old_workspaces:
-        workspace_conf_file = workspaces_path
-        text_file = open(workspace_conf_file, "w")
-
         now = datetime.datetime.now()
         line = (
             "# Generated by nwg-displays on {} at {}. Do not edit manually.\n".format(
@@ -911,7 +1090,7 @@ def on_workspaces_apply_btn_hypr(w, win, old_workspaces):
                 datetime.datetime.strftime(now, "%H:%M:%S"),
             )
         )
-        text_file.write(line + "\n")
+        lines = [line]
 
         monitors_with_default_workspace = []
         for ws in workspaces:
@@ -925,15 +1104,15 @@ def on_workspaces_apply_btn_hypr(w, win, old_workspaces):
                 line += ",default:true"
                 monitors_with_default_workspace.append(mon)
 
-            text_file.write(line + "\n")
+            lines.append(line)
 
-        text_file.close()
-        notify("Workspaces assignment", "Restart Hyprland for changes to take effect")
+        if save_list_to_text_file(lines, workspaces_path):
+            notify("Workspaces assignment", "Restart Hyprland for changes to take effect")
 
     close_dialog(w, win)
 
 
-def create_confirm_win(backup, path, config_dir=None, profile_name=None):
+def create_confirm_win(journal, config_dir=None, profile_name=None):
     global confirm_win
     if confirm_win:
         confirm_win.destroy()
@@ -962,90 +1141,54 @@ def create_confirm_win(backup, path, config_dir=None, profile_name=None):
     grid.attach(cnt_lbl, 0, 1, 2, 1)
     btn_restore = Gtk.Button.new_with_label(voc["restore"])
 
-    btn_restore.connect("clicked", restore_old_settings, backup, path)
+    btn_restore.connect("clicked", restore_old_settings, journal)
 
     grid.attach(btn_restore, 0, 2, 1, 1)
     btn_keep = Gtk.Button.new_with_label(voc["keep"])
-    btn_keep.connect("clicked", keep_current_settings, config_dir, profile_name)
+    btn_keep.connect("clicked", keep_current_settings, journal, config_dir, profile_name)
     grid.attach(btn_keep, 1, 2, 1, 1)
 
     confirm_win.show_all()
 
     global src_tag
-    src_tag = GLib.timeout_add_seconds(1, count_down, cnt_lbl, backup, path)
+    src_tag = GLib.timeout_add_seconds(1, count_down, cnt_lbl, journal)
 
 
-def count_down(label, backup, path):
+def count_down(label, journal):
     global counter
     if counter > 0:
         counter -= 1
         label.set_text(str(counter))
         return True
 
-    restore_old_settings(None, backup, path)
+    restore_old_settings(None, journal)
 
 
-def keep_current_settings(btn, config_dir=None, profile_name=None):
+def keep_current_settings(btn, journal, config_dir=None, profile_name=None):
     if src_tag > 0:
         GLib.Source.remove(src_tag)
     confirm_win.close()
 
-    if os.getenv("NIRI_SOCKET"):
-        niri_reload_config()
-        GLib.timeout_add(2000, create_display_buttons)
+    if niri:
+        # The settings are already in effect, and saved to monitor.kdl; just let niri settle down
+        refresh_when_ready(wait_for_layout, journal.targets)
 
     if config_dir and profile_name:
         if config.get("profile-bound-wallpapers", True):
-            threading.Thread(
-                target=WallpaperManager.apply_profile_wallpapers,
-                args=(config_dir, profile_name),
-                daemon=True,
-            ).start()
+            # Replaces wallpapers of a previous apply, if still pending
+            apply_queue.submit(WallpaperManager.apply_profile_wallpapers, config_dir, profile_name)
 
 
-def restore_old_settings(btn, backup, path):
+def restore_old_settings(btn, journal):
     print("[Settings] Restoring old settings...")
     if src_tag > 0:
         GLib.Source.remove(src_tag)
 
-    if os.getenv("SWAYSOCK"):
-        save_list_to_text_file(backup, path)
-
-        # Parse backup file back to commands and execute them
-        single_line = ""
-        # omit comments & empty lines
-        for line in backup:
-            if not line.startswith("#") and line:
-                single_line += line
-        # remove "{"
-        single_line = single_line.replace("{", "")
-        # convert multiple spaces into single
-        single_line = " ".join(single_line.split())
-        cmds = single_line.split("}")
-        # execute line by line
-        i3 = Connection()
-        for cmd in cmds:
-            if cmd:
-                i3.command(cmd)
-
-        confirm_win.close()
-        create_display_buttons()
-
-    elif os.getenv("HYPRLAND_INSTANCE_SIGNATURE"):
-        save_list_to_text_file(backup, path)
-        confirm_win.close()
-        # Don't execute any command here, just save the file and wait for Hyprland to notice and apply the change.
-        # Let's give it some time to do it before refreshing UI.
-        GLib.timeout_add(2000, create_display_buttons)
-
-    elif os.getenv("NIRI_SOCKET"):
-        # For niri: backup is a file path (.bak), restore by copying it back
-        if backup and os.path.isfile(backup):
-            shutil.copy2(backup, path)
-            print(f"[niri] Restored from {backup}")
-        confirm_win.close()
-        niri_reload_config()
-        GLib.timeout_add(2000, create_display_buttons)
+    # Reverts the changes over IPC, and restores the files written
+    journal.rollback(backend)
+
+    confirm_win.close()
+    refresh_display_buttons(force=True)
 
 
 def main():
@@ -1428,24 +1571,17 @@ def main():
     global fixed
     fixed = builder.get_object("fixed")
 
-    create_display_buttons()
+    refresh_display_buttons()
 
-    global outputs_activity
-    outputs_activity = list_outputs_activity()
     lbl = Gtk.Label()
     lbl.set_text("{}:".format(voc["active"]))
     form_wrapper_box.pack_start(lbl, False, False, 3)
-    for key in outputs_activity:
-        cb = Gtk.CheckButton()
-        cb.set_label(key)
-        cb.set_active(outputs_activity[key])
-        cb.connect("toggled", on_output_toggled, key)
-        form_wrapper_box.pack_start(cb, False, False, 3)
+    refresh_activity_check_buttons()
 
     btn = Gtk.Button.new_with_label(voc["toggle"])
     if sway:
         btn.set_tooltip_text(voc["toggle-tooltip"])
-        btn.connect("clicked", on_toggle_button)
+        btn.connect("clicked", on_sway_toggle_button)
         form_wrapper_box.pack_start(btn, False, False, 3)
     else:
         btn.destroy()
@@ -1530,9 +1666,9 @@ def main():
     profile_manager.set_profile_label(profile_label)
 
     # Also pass display_buttons and other required data to profile manager
-    profile_manager.set_display_buttons(display_buttons)
-    profile_manager.set_fixed(fixed)
-    profile_manager.set_update_callback(update_form_from_widget)
+    profile_manager.set_layout(layout)
+    profile_manager.set_outputs_activity(outputs_activity)
+    profile_manager.set_update_callback(on_profile_loaded)
 
     if display_buttons:
         update_form_from_widget(display_buttons[0])
@@ -1549,6 +1685,14 @@ def main():
 
     window.show_all()
 
+    # Update the canvas on output hotplug / reconfiguration, instead of waiting for a guessed delay
+    global output_watcher
+    output_watcher = OutputEventWatcher(on_output_event)
+    output_watcher.start()
+    display = Gdk.Display.get_default()
+    display.connect("monitor-added", on_monitor_changed)
+    display.connect("monitor-removed", on_monitor_changed)
+
     # Gtk.Fixed does not respect expand properties. That's why we need
     # to scale the window automagically if opened as a floating_con
     Gdk.threads_add_timeout(GLib.PRIORITY_LOW, 100, scale_if_floating)
@@ -0,0 +1,87 @@
+"""
+Compact table of the modes supported by an output
+"""
+
+from array import array
+
+
+class ModeTable:
+    """
+    Deduplicated modes of a single output, sorted largest and fastest first. Columns are kept in integer arrays:
+    width, height and refresh in millihertz. Row lookups by exact mode and by resolution are hash-based.
+    """
+
+    __slots__ = ("widths", "heights", "refreshes", "native", "_index", "_by_resolution")
+
+    def __init__(self, modes=()):
+        """
+        Takes an iterable of {"width", "height", "refresh"} dictionaries, with refresh in mHz, as reported by
+        compositors. A mode with the "preferred" key set True becomes the native one.
+        """
+        unique = {}
+        preferred = None
+        for m in modes:
+            try:
+                key = (int(m["width"]), int(m["height"]), round(float(m["refresh"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+            unique[key] = True
+            if m.get("preferred"):
+                preferred = key
+        keys = sorted(unique, reverse=True)
+
+        self.widths = array("i", (k[0] for k in keys))
+        self.heights = array("i", (k[1] for k in keys))
+        self.refreshes = array("i", (k[2] for k in keys))
+
+        self._index = {key: i for i, key in enumerate(keys)}
+        # Rows are sorted, so the first row of each resolution carries its highest refresh rate
+        self._by_resolution = {}
+        for i, (w, h, r) in enumerate(keys):
+            self._by_resolution.setdefault((w, h), []).append(i)
+
+        # Native mode: the preferred one if the compositor tells, otherwise the largest area at its highest refresh
+        if preferred is not None:
+            self.native = self._index[preferred]
+        elif keys:
+            self.native = max(self._by_resolution.values(), key=lambda rows: self.widths[rows[0]] * self.heights[
+                rows[0]])[0]
+        else:
+            self.native = None
+
+    def __len__(self):
+        return len(self.refreshes)
+
+    def __eq__(self, other):
+        if not isinstance(other, ModeTable):
+            return NotImplemented
+        return (self.native == other.native and self.widths == other.widths and self.heights == other.heights
+                and self.refreshes == other.refreshes)
+
+    __hash__ = None
+
+    def __getitem__(self, i):
+        """Returns the (width, height, refresh_mhz) tuple of the row."""
+        return self.widths[i], self.heights[i], self.refreshes[i]
+
+    def __iter__(self):
+        return zip(self.widths, self.heights, self.refreshes)
+
+    def find(self, width, height, refresh_mhz, tolerance=0):
+        """
+        Returns the row of the mode, or None if not listed. With `tolerance` (in mHz), the closest refresh rate of
+        the resolution within it is accepted, e.g. 59951 for 59950.
+        """
+        i = self._index.get((width, height, refresh_mhz))
+        if i is not None or not tolerance:
+            return i
+
+        best = None
+        for row in self._by_resolution.get((width, height), ()):
+            diff = abs(self.refreshes[row] - refresh_mhz)
+            if diff <= tolerance and (best is None or diff < abs(self.refreshes[best] - refresh_mhz)):
+                best = row
+        return best
+
+    def label(self, i):
+        return "{}x{}@{}Hz".format(self.widths[i], self.heights[i], self.refreshes[i] / 1000)
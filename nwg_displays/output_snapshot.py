@@ -0,0 +1,143 @@
+"""
+Typed model of the outputs reported by the compositor
+"""
+
+import time
+
+from nwg_displays.modes import ModeTable
+
+
+class OutputState:
+    """State of a single output, as reported by the compositor."""
+
+    __slots__ = (
+        "name",
+        "description",
+        "make",
+        "model",
+        "serial",
+        "active",
+        "dpms",
+        "focused",
+        "x",
+        "y",
+        "logical_width",
+        "logical_height",
+        "physical_width",
+        "physical_height",
+        "transform",
+        "scale",
+        "scale_filter",
+        "refresh",
+        "modes",
+        "adaptive_sync",
+        "mirror",
+        "ten_bit",
+        "monitor",  # Gdk.Monitor, assigned in the GUI only
+    )
+
+    def __init__(self, name, **kwargs):
+        self.name = name
+        self.description = ""
+        self.make = None
+        self.model = None
+        self.serial = None
+        self.active = True
+        self.dpms = True
+        self.focused = False
+        self.x = 0
+        self.y = 0
+        self.logical_width = 0
+        self.logical_height = 0
+        self.physical_width = 0
+        self.physical_height = 0
+        self.transform = "normal"
+        self.scale = 1.0
+        self.scale_filter = None
+        self.refresh = None
+        self.modes = ModeTable()
+        self.adaptive_sync = False
+        self.mirror = ""
+        self.ten_bit = False
+        self.monitor = None
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    @classmethod
+    def from_dict(cls, name, d):
+        """Converts the dictionaries built by the compositor-specific parsers."""
+        return cls(
+            name,
+            description=d.get("description", ""),
+            make=d.get("make"),
+            model=d.get("model"),
+            serial=d.get("serial"),
+            active=d.get("active", True),
+            dpms=d.get("dpms", True),
+            focused=d.get("focused", False),
+            x=d.get("x", 0),
+            y=d.get("y", 0),
+            logical_width=d.get("logical-width", 0),
+            logical_height=d.get("logical-height", 0),
+            physical_width=d.get("physical-width", 0),
+            physical_height=d.get("physical-height", 0),
+            transform=d.get("transform") or "normal",
+            scale=d.get("scale") or 1.0,
+            scale_filter=d.get("scale_filter"),
+            refresh=d.get("refresh"),
+            modes=ModeTable(d.get("modes", [])),
+            adaptive_sync=d.get("adaptive_sync_status") == "enabled",
+            mirror=d.get("mirror", ""),
+            ten_bit=d.get("ten_bit", False),
+            monitor=d.get("monitor"),
+        )
+
+    def same_config(self, other):
+        """Tells if `other` reports the same output configuration; focus and the Gdk.Monitor don't count."""
+        return all(getattr(self, key) == getattr(other, key)
+                   for key in self.__slots__ if key not in ("focused", "monitor"))
+
+    def __repr__(self):
+        return "OutputState({})".format(
+            ", ".join("{}={!r}".format(key, getattr(self, key)) for key in self.__slots__ if key != "modes")
+        )
+
+
+class OutputSnapshot:
+    """
+    Read-only mapping of output names to OutputState, taken at a point in time.
+    """
+
+    __slots__ = ("outputs", "timestamp")
+
+    def __init__(self, outputs, timestamp=None):
+        self.outputs = outputs
+        self.timestamp = timestamp if timestamp is not None else time.monotonic()
+
+    def age(self):
+        return time.monotonic() - self.timestamp
+
+    def activity(self):
+        """Returns the "name": is_active dictionary."""
+        return {name: state.active for name, state in self.outputs.items()}
+
+    def active(self):
+        return {name: state for name, state in self.outputs.items() if state.active}
+
+    def get(self, name, default=None):
+        return self.outputs.get(name, default)
+
+    def items(self):
+        return self.outputs.items()
+
+    def __getitem__(self, name):
+        return self.outputs[name]
+
+    def __contains__(self, name):
+        return name in self.outputs
+
+    def __iter__(self):
+        return iter(self.outputs)
+
+    def __len__(self):
+        return len(self.outputs)
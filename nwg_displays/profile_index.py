@@ -0,0 +1,77 @@
+"""
+Fingerprint-indexed lookup of profiles, for nwg-displays-daemon
+"""
+
+import hashlib
+import os
+
+from nwg_displays.tools import load_json
+
+
+def output_fingerprint(outputs):
+    """
+    Returns a stable fingerprint of a set of connected outputs, given as (name, description) pairs.
+    The description holds make, model and serial, so the same monitor plugged to another port gives another set.
+    """
+    items = sorted("{}\t{}".format(name, " ".join(str(description).split())) for name, description in outputs)
+
+    return hashlib.sha1("\n".join(items).encode("utf-8")).hexdigest()
+
+
+def profile_fingerprint(profile_data):
+    return output_fingerprint(
+        (d.get("name", ""), d.get("description", "")) for d in profile_data.get("displays", [])
+    )
+
+
+class ProfileIndex:
+    """
+    Maps output set fingerprints to profiles found in the profiles directory. The index is only rebuilt when
+    the directory mtime changes, so lookups don't re-read every profile file.
+    """
+
+    def __init__(self, profiles_dir):
+        self.profiles_dir = profiles_dir
+        self._mtime = None
+        self._index = {}  # "fingerprint": [("profile name", profile_data), ...]
+
+    def _rebuild_if_needed(self):
+        try:
+            mtime = os.stat(self.profiles_dir).st_mtime_ns
+        except OSError:
+            self._mtime = None
+            self._index = {}
+            return
+
+        if mtime == self._mtime:
+            return
+
+        index = {}
+        for file in sorted(os.listdir(self.profiles_dir)):
+            if not file.endswith(".json"):
+                continue
+            profile_data = load_json(os.path.join(self.profiles_dir, file))
+            if not profile_data or "displays" not in profile_data:
+                continue
+            fingerprint = profile_fingerprint(profile_data)
+            index.setdefault(fingerprint, []).append((file[:-5], profile_data))
+
+        self._index = index
+        self._mtime = mtime
+        print(f"[Profiles] Indexed {sum(len(v) for v in index.values())} profile(s)")
+
+    def lookup(self, fingerprint, preferred=None):
+        """
+        Returns (profile_name, profile_data) matching the fingerprint, or None. If several profiles match,
+        the `preferred` one wins, otherwise the first one in alphabetical order.
+        """
+        self._rebuild_if_needed()
+        candidates = self._index.get(fingerprint)
+        if not candidates:
+            return None
+
+        for name, profile_data in candidates:
+            if name == preferred:
+                return name, profile_data
+
+        return candidates[0]
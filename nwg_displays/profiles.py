@@ -10,7 +10,8 @@ import gi
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk
 
-from nwg_displays.tools import save_json, load_json, notify
+from nwg_displays.layout import OutputLayout
+from nwg_displays.tools import SNAPSHOT_TTL, save_json, load_json, notify, query_outputs
 
 
 class ProfileManager:
@@ -21,8 +22,8 @@ class ProfileManager:
         self.config = config
         self.voc = voc
         self.btn_save_profile = None
-        self.display_buttons = None
-        self.fixed = None
+        self.layout = None
+        self.outputs_activity = None
         self.update_callback = None
         self.profile_label = None
 
@@ -47,16 +48,16 @@ class ProfileManager:
         if self.current_profile:
             self.btn_save_profile.set_sensitive(True)
 
-    def set_display_buttons(self, buttons):
-        """Store reference to display buttons"""
-        self.display_buttons = buttons
+    def set_layout(self, layout):
+        """Store reference to the layout model"""
+        self.layout = layout
 
-    def set_fixed(self, fixed):
-        """Store reference to the fixed container"""
-        self.fixed = fixed
+    def set_outputs_activity(self, outputs_activity):
+        """Store reference to the "name": is_active dictionary, which also lists outputs missing from the layout"""
+        self.outputs_activity = outputs_activity
 
     def set_update_callback(self, callback):
-        """Store reference to form update callback"""
+        """Store reference to the callback refreshing the view after a profile has been loaded"""
         self.update_callback = callback
 
     def set_profile_label(self, label):
@@ -82,7 +83,7 @@ class ProfileManager:
 
     def create_profile(self, widget):
         """Create a new profile with the current display configuration"""
-        if not self.display_buttons:
+        if not self.layout:
             notify(
                 self.voc.get("error", "Error"),
                 self.voc.get("no-displays", "No displays available"),
@@ -291,45 +292,35 @@ class ProfileManager:
 
     def save_profile_to_file(self, profile_path):
         """Save the current display configuration to a profile file"""
-        if not self.display_buttons:
+        if not self.layout:
             return
 
-        profile_data = {"displays": [], "config": self.config}
-
-        for db in self.display_buttons:
-            display = {
-                "name": db.name,
-                "description": db.description,
-                "x": db.x,
-                "y": db.y,
-                "physical_width": db.physical_width,
-                "physical_height": db.physical_height,
-                "transform": db.transform,
-                "scale": db.scale,
-                "scale_filter": db.scale_filter,
-                "refresh": db.refresh,
-                "dpms": db.dpms,
-                "adaptive_sync": db.adaptive_sync,
-                "custom_mode": db.custom_mode,
-                "mirror": db.mirror,
-                "ten_bit": db.ten_bit,
-                "active": db.active,
-            }
-            profile_data["displays"].append(display)
-
+        profile_data = self.layout.to_profile(self.config)
+        profile_data["displays"] += self._inactive_displays()
         save_json(profile_data, profile_path)
 
+    def _inactive_displays(self):
+        """
+        Entries of connected outputs which are turned off, and thus missing from the layout (on sway).
+        They belong to the output set too: nwg-displays-daemon fingerprints all the connected outputs.
+        """
+        if not self.outputs_activity:
+            return []
+
+        snapshot = query_outputs(SNAPSHOT_TTL)
+        displays = []
+        for name, active in self.outputs_activity.items():
+            if active or self.layout.get(name) is not None or name not in snapshot:
+                continue
+            output = OutputLayout.from_output(snapshot[name])
+            output.update(active=False)
+            displays.append(output.to_profile_dict())
+
+        return displays
+
     def load_profile_from_file(self, profile_path):
         """Load display configuration from a profile file"""
-        # Refresh display buttons from fixed container to ensure we have live widgets
-        if self.fixed:
-            self.display_buttons = [
-                w
-                for w in self.fixed.get_children()
-                if hasattr(w, "physical_width") and hasattr(w, "name")
-            ]
-
-        if not self.display_buttons or not self.fixed or not self.update_callback:
+        if not self.layout or not self.update_callback:
             notify(
                 self.voc.get("error", "Error"),
                 self.voc.get(
@@ -351,96 +342,10 @@ class ProfileManager:
             for key, value in profile_data["config"].items():
                 self.config[key] = value
 
-        updated_displays = []
-        if "displays" in profile_data:
-            # First apply transforms to ensure correct dimensions before positioning
-            for db in self.display_buttons:
-                for display in profile_data["displays"]:
-                    if db.name == display["name"]:
-                        # Update transform first so the sizing is correct
-                        db.transform = display.get("transform", "normal")
-                        db.physical_width = int(display.get("physical_width") or 0)
-                        db.physical_height = int(display.get("physical_height") or 0)
-                        db.scale = float(display.get("scale") or 1.0)
-                        # Update the button's size according to the new transform
-                        db.rescale_transform()
-                        break
-
-            # Now update positions and other settings
-            for db in self.display_buttons:
-                for display in profile_data["displays"]:
-                    if db.name == display["name"]:
-                        updated_displays.append(db.name)
-                        # Update all other display settings
-                        db.x = int(display.get("x") or 0)
-                        db.y = int(display.get("y") or 0)
-
-                        db.scale_filter = display.get("scale_filter", "linear")
-                        db.refresh = float(display.get("refresh") or 60.0)
-                        db.dpms = (
-                            display.get("dpms")
-                            if display.get("dpms") is not None
-                            else True
-                        )
-                        db.adaptive_sync = (
-                            display.get("adaptive_sync")
-                            if display.get("adaptive_sync") is not None
-                            else False
-                        )
-                        db.custom_mode = (
-                            display.get("custom_mode")
-                            if display.get("custom_mode") is not None
-                            else False
-                        )
-                        db.mirror = display.get("mirror", "")
-                        db.ten_bit = (
-                            display.get("ten_bit")
-                            if display.get("ten_bit") is not None
-                            else False
-                        )
-                        db.active = (
-                            display.get("active")
-                            if display.get("active") is not None
-                            else True
-                        )
-
-                        # Update button position with the correct dimensions
-                        self.fixed.move(
-                            db,
-                            db.x * self.config["view-scale"],
-                            db.y * self.config["view-scale"],
-                        )
-                        break
-
-        # Handle displays not in the profile (e.g. newly connected)
-        # We place them to the right of the profile displays to avoid overlap
-        max_x = 0
-        for db in self.display_buttons:
-            if db.name in updated_displays:
-                max_x = max(max_x, db.x + db.logical_width)
-
-        current_x = max_x + 10
-        for db in self.display_buttons:
-            if db.name not in updated_displays:
-                # Ensure the button is rescaled according to the new view-scale
-                db.rescale_transform()
-
-                # Move to a safe position
-                db.x = int(current_x)
-                db.y = 0
-
-                self.fixed.move(
-                    db,
-                    db.x * self.config["view-scale"],
-                    db.y * self.config["view-scale"],
-                )
-
-                current_x += db.logical_width + 10
+        # Observers (DisplayButtons) follow the model
+        self.layout.apply_profile(profile_data)
 
-        # Update the form if a display is selected
-        selected_button = next((db for db in self.display_buttons if db.selected), None)
-        if selected_button:
-            try:
-                self.update_callback(selected_button)
-            except Exception as e:
-                print(f"[Error] Error updating form: {e}")
+        try:
+            self.update_callback()
+        except Exception as e:
+            print(f"[Error] Error updating form: {e}")
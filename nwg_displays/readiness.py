@@ -0,0 +1,60 @@
+"""
+Waiting for the compositor to actually reach the layout we've applied, instead of sleeping for a fixed time.
+The outputs are polled w/ exponential backoff, so we go on as soon as they match, or give up at the deadline.
+"""
+
+import time
+
+from nwg_displays.settings_applier.output_diff import diff_outputs
+from nwg_displays.tools import invalidate_outputs, query_outputs
+
+# Seconds to wait for the compositor at most
+READY_TIMEOUT = 3.0
+# Polling interval: starts at FIRST_DELAY, doubles up to MAX_DELAY (seconds)
+FIRST_DELAY = 0.01
+MAX_DELAY = 0.25
+
+
+def wait_until(ready, timeout=READY_TIMEOUT, cancelled=None):
+    """
+    Polls fresh OutputSnapshots until `ready(snapshot)` returns True. Returns the time it took in seconds,
+    or None if the deadline passed, or `cancelled()` turned True.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    delay = FIRST_DELAY
+    while True:
+        invalidate_outputs()
+        try:
+            if ready(query_outputs()):
+                elapsed = time.monotonic() - start
+                print(f"[Apply] Outputs ready in {elapsed * 1000:.0f} ms")
+                return elapsed
+        except Exception as e:
+            print(f"[Warning] Couldn't query outputs: {e}")
+
+        remaining = deadline - time.monotonic()
+        if cancelled and cancelled():
+            return None
+        if remaining <= 0:
+            print(f"[Warning] Outputs didn't reach the target layout in {timeout} s")
+            return None
+
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, MAX_DELAY)
+
+
+def wait_for_layout(targets, timeout=READY_TIMEOUT, cancelled=None):
+    """Waits until the live outputs match {"name": target}, as compared by output_diff.diff_outputs()."""
+    return wait_until(lambda snapshot: not diff_outputs(targets, snapshot), timeout, cancelled)
+
+
+def wait_for_activity(activity, timeout=READY_TIMEOUT, cancelled=None):
+    """
+    Waits until outputs of the "name": is_active dictionary are turned on/off. Names unknown to the compositor
+    (e.g. of disconnected outputs) are ignored.
+    """
+    def ready(snapshot):
+        return all(snapshot[name].active == active for name, active in activity.items() if name in snapshot)
+
+    return wait_until(ready, timeout, cancelled)
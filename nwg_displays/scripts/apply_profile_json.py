@@ -3,7 +3,7 @@ import sys
 import json
 import argparse
 from nwg_displays.settings_applier import SettingsApplier
-from nwg_displays.tools import get_config_dir
+from nwg_displays.tools import get_config_dir, get_outputs_path
 
 
 def main():
@@ -12,7 +12,7 @@ def main():
         "-p", "--profile", type=str, required=True, help="Name of the profile to load"
     )
     parser.add_argument(
-        "-c", "--config", type=str, help="Path to monitors.conf override"
+        "-c", "--config", type=str, help="Path to the outputs config file (e.g. monitors.conf) override"
     )
 
     args = parser.parse_args()
@@ -23,9 +23,7 @@ def main():
     if args.config:
         outputs_path = args.config
     else:
-        outputs_path = os.path.join(
-            os.path.expanduser("~/.config/hypr/"), "monitors.conf"
-        )
+        outputs_path = get_outputs_path()
 
     if not os.path.isfile(profile_path):
         print(f"[Error] Profile file not found at {profile_path}")
@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+import argparse
+from nwg_displays.settings_applier import ApplyQueue, SettingsApplier
+from nwg_displays.ipc import OutputEventWatcher
+from nwg_displays.profile_index import ProfileIndex, output_fingerprint
+from nwg_displays.tools import get_config_dir, get_outputs_path, query_outputs, invalidate_outputs, load_json
+
+# Time without further output events, before we consider the output set settled (seconds)
+SETTLE_TIME = 0.05
+
+
+def current_fingerprint():
+    outputs = query_outputs()
+    return output_fingerprint((name, outputs[name].description) for name in outputs)
+
+
+def active_profile_name(config_dir):
+    state_file = os.path.join(config_dir, "active_profile.json")
+    data = load_json(state_file) if os.path.isfile(state_file) else None
+    return data.get("active_profile") if data else None
+
+
+def apply_profile(profile_data, outputs_path, config_dir, profile_name, cancelled=None):
+    try:
+        SettingsApplier.apply_from_json(profile_data, outputs_path, config_dir, profile_name, cancelled)
+    except Exception as e:
+        print(f"[Error] Failed to apply profile '{profile_name}': {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Apply the matching nwg-displays profile whenever the set of connected outputs changes.")
+    parser.add_argument(
+        "-c", "--config", type=str, help="Path to the outputs config file override"
+    )
+    parser.add_argument(
+        "-d", "--dry-run", action="store_true", help="Only print the matching profile, don't apply it"
+    )
+
+    args = parser.parse_args()
+
+    config_dir = get_config_dir()
+    outputs_path = args.config if args.config else get_outputs_path()
+    index = ProfileIndex(os.path.join(config_dir, "profiles"))
+
+    changed = threading.Event()
+    def on_output_event(kind, name):
+        invalidate_outputs()
+        changed.set()
+
+    watcher = OutputEventWatcher(on_output_event)
+    if not watcher.start():
+        print("[Error] No supported compositor detected (sway/Hyprland/niri)")
+        sys.exit(1)
+
+    apply_queue = ApplyQueue()
+    last_fingerprint = None
+    # Check the current output set on startup, as if it has just been connected
+    changed.set()
+
+    try:
+        while True:
+            changed.wait()
+            # Outputs come and go in bursts; wait for the dust to settle
+            changed.clear()
+            while changed.wait(SETTLE_TIME):
+                changed.clear()
+
+            try:
+                fingerprint = current_fingerprint()
+            except Exception as e:
+                print(f"[Error] Failed to query outputs: {e}")
+                continue
+
+            if fingerprint == last_fingerprint:
+                continue
+            last_fingerprint = fingerprint
+
+            match = index.lookup(fingerprint, preferred=active_profile_name(config_dir))
+            if not match:
+                print("[Daemon] No profile matches the connected outputs")
+                continue
+
+            profile_name, profile_data = match
+            print(f"[Daemon] Outputs changed, matching profile: '{profile_name}'")
+            if args.dry_run:
+                continue
+
+            # Applied by the worker, so that we keep listening; a newer match cancels the apply in progress.
+            apply_queue.submit(apply_profile, profile_data, outputs_path, config_dir, profile_name)
+
+    except KeyboardInterrupt:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
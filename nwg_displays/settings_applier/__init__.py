@@ -1,3 +1,5 @@
 from .settings_applier import SettingsApplier
+from .apply_journal import ApplyJournal
+from .apply_queue import ApplyLock, ApplyQueue
 
-__all__ = ["SettingsApplier"]
+__all__ = ["SettingsApplier", "ApplyJournal", "ApplyLock", "ApplyQueue"]
@@ -0,0 +1,93 @@
+"""
+Journal of a single apply: the live state of outputs before it, commands sent, and files written. Rolling back
+replays the inverse of the changes directly over IPC, so we don't need to parse backup files back into commands.
+"""
+
+import hashlib
+
+from nwg_displays.tools import invalidate_outputs, write_file_atomic
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest() if text is not None else None
+
+
+def _read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class FileRecord:
+    """A file written by the apply, w/ its previous content (None if it didn't exist) and content hashes."""
+
+    __slots__ = ("path", "before", "before_hash", "after_hash")
+
+    def __init__(self, path, before, after):
+        self.path = path
+        self.before = before
+        self.before_hash = _sha256(before)
+        self.after_hash = _sha256(after)
+
+    @property
+    def changed(self):
+        return self.before_hash != self.after_hash
+
+
+class ApplyJournal:
+    def __init__(self, snapshot, targets, changes):
+        # OutputSnapshot taken before the apply (may be empty, if the query failed)
+        self.snapshot = snapshot
+        # {"name": target} we've applied, in the output_diff format
+        self.targets = targets
+        # {"name": set_of_changed_attributes}, as returned by output_diff.diff_outputs()
+        self.changes = changes
+        self.commands = []
+        self.files = []
+
+    def sent(self, cmds):
+        self.commands.extend(cmds)
+
+    def save_file(self, save, lines, path):
+        """Calls `save(lines, path)`, e.g. tools.save_list_to_text_file, recording the file before and after."""
+        before = _read(path)
+        written = save(lines, path)
+        self.files.append(FileRecord(path, before, _read(path)))
+        return written
+
+    def inverse(self):
+        """
+        Returns {"name": OutputState} of the pre-apply state of changed outputs. The second value tells if all of
+        them were found in the snapshot, i.e. if the apply may be fully reverted over IPC.
+        """
+        states = {}
+        for name in self.changes:
+            state = self.snapshot.get(name) if self.snapshot else None
+            if state is not None:
+                states[name] = state
+
+        return states, len(states) == len(self.changes)
+
+    def restore_files(self):
+        for record in reversed(self.files):
+            if not record.changed:
+                continue
+            # A file created by the apply is left empty, not removed: config.kdl or hyprland.conf include it by now
+            write_file_atomic(record.path, record.before if record.before is not None else "")
+            print(f"[Rollback] Restored {record.path}")
+
+    def rollback(self, backend):
+        """
+        Sends the inverse commands in a single batch, and restores the files. If the compositor didn't accept them,
+        or the pre-apply state is unknown, makes it re-read the restored config instead. Returns True on success.
+        """
+        ok = backend.rollback(self) if self.changes else True
+        self.restore_files()
+        if not ok:
+            print("[Rollback] Couldn't revert outputs over IPC, reloading config")
+            backend.reload()
+        invalidate_outputs()
+
+        return ok
@@ -0,0 +1,159 @@
+"""
+Serialization of applies. In a process, ApplyQueue runs jobs on a single worker thread, and only the latest
+request wins: a new job replaces the pending one and cancels the running one. Across processes (e.g. several
+nwg-displays-apply invocations bound to a key), ApplyLock makes them wait for each other, and tells the ones
+superseded by a newer invocation to give up.
+"""
+
+import fcntl
+import os
+import tempfile
+import threading
+
+
+class Job:
+    __slots__ = ("func", "args", "_cancelled")
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+
+class ApplyQueue:
+    """
+    Jobs are called as `func(*args, cancelled=job.cancelled)`, and should check `cancelled()` before each
+    costly step, e.g. before spawning wallpaper processes.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = None
+        self._running = None
+        self._thread = None
+
+    def submit(self, func, *args):
+        job = Job(func, args)
+        with self._cond:
+            self._cancel()
+            self._pending = job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+        return job
+
+    def cancel(self):
+        """Cancels the pending and the running job, if any."""
+        with self._cond:
+            self._cancel()
+
+    def _cancel(self):
+        for job in (self._pending, self._running):
+            if job:
+                job.cancel()
+        self._pending = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                job, self._pending = self._pending, None
+                self._running = job
+
+            try:
+                if not job.cancelled():
+                    job.func(*job.args, cancelled=job.cancelled)
+            except Exception as e:
+                print(f"[Error] Apply job failed: {e}")
+            finally:
+                with self._cond:
+                    self._running = None
+
+
+def _runtime_dir():
+    return os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+
+
+class ApplyLock:
+    """
+    Context manager holding an exclusive flock on the apply lock file. On entering, every process takes a ticket
+    from the sequence file, so once it gets the lock, it may tell if a newer request is queued behind it.
+    """
+
+    def __init__(self, name="nwg-displays-apply"):
+        self.lock_path = os.path.join(_runtime_dir(), f"{name}.lock")
+        self.seq_path = os.path.join(_runtime_dir(), f"{name}.seq")
+        self.ticket = None
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def acquire(self, blocking=True):
+        """
+        Waits for the lock, unless not `blocking`: then returns False at once, if another process holds it.
+        In that case we don't take a ticket, so that the holder isn't told it's been superseded for nothing.
+        """
+        if blocking:
+            self.ticket = self._next_ticket()
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        if not blocking:
+            self.ticket = self._next_ticket()
+        return True
+
+    def release(self):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def superseded(self):
+        """Tells if another process took a ticket after us, i.e. wants to apply something newer."""
+        fd = self._open_seq(fcntl.LOCK_SH)
+        try:
+            return self._read_seq(fd) != self.ticket
+        finally:
+            os.close(fd)
+
+    def _next_ticket(self):
+        fd = self._open_seq(fcntl.LOCK_EX)
+        try:
+            seq = self._read_seq(fd) + 1
+            os.ftruncate(fd, 0)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, str(seq).encode())
+        finally:
+            os.close(fd)
+
+        return seq
+
+    def _open_seq(self, operation):
+        # Closing the file descriptor releases the lock
+        fd = os.open(self.seq_path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, operation)
+        return fd
+
+    @staticmethod
+    def _read_seq(fd):
+        try:
+            return int(os.read(fd, 32) or 0)
+        except ValueError:
+            return 0
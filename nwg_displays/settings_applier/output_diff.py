@@ -0,0 +1,206 @@
+"""
+Compares the target layout with the live state of outputs, so that we only push what actually changed.
+Both sides are normalized to plain dicts:
+{"active", "width", "height", "refresh", "x", "y", "transform", "scale", "scale_filter", "adaptive_sync", "dpms",
+"mirror", "ten_bit"}
+Targets may set "mirror" and "ten_bit" to None, if the compositor doesn't support them.
+"""
+
+# Attributes we may change separately
+ATTRIBUTES = ("active", "mode", "position", "transform", "scale", "scale_filter", "adaptive_sync", "dpms", "mirror",
+              "ten_bit")
+
+
+def millihertz(refresh):
+    return round(float(refresh) * 1000) if refresh else 0
+
+
+def target_from_button(db, active=True):
+    return {
+        "active": active,
+        "width": db.physical_width,
+        "height": db.physical_height,
+        "refresh": db.refresh,
+        "x": db.x,
+        "y": db.y,
+        "transform": db.transform,
+        "scale": db.scale,
+        "scale_filter": db.scale_filter,
+        "adaptive_sync": db.adaptive_sync,
+        "dpms": db.dpms,
+        "mirror": db.mirror,
+        "ten_bit": db.ten_bit,
+    }
+
+
+def target_from_display(d):
+    """Normalizes a display entry of a profile JSON file."""
+    return {
+        "active": d.get("active", True),
+        "width": d["physical_width"],
+        "height": d["physical_height"],
+        "refresh": d["refresh"],
+        "x": d["x"],
+        "y": d["y"],
+        "transform": d.get("transform", "normal"),
+        "scale": d.get("scale", 1.0),
+        "scale_filter": d.get("scale_filter"),
+        "adaptive_sync": d.get("adaptive_sync", False),
+        "dpms": d.get("dpms", True),
+        "mirror": d.get("mirror", ""),
+        "ten_bit": d.get("ten_bit", False),
+    }
+
+
+def live_from_output(output):
+    """Normalizes an OutputState of the live snapshot."""
+    return {
+        "active": output.active,
+        "width": output.physical_width,
+        "height": output.physical_height,
+        "refresh": output.refresh,
+        "x": output.x,
+        "y": output.y,
+        "transform": output.transform,
+        "scale": output.scale,
+        "scale_filter": output.scale_filter,
+        "adaptive_sync": output.adaptive_sync,
+        "dpms": output.dpms,
+        "mirror": output.mirror,
+        "ten_bit": output.ten_bit,
+    }
+
+
+def changed_attributes(target, live):
+    """Returns the set of ATTRIBUTES that differ between the target and the live state of a single output."""
+    if live is None:
+        return set(ATTRIBUTES)
+
+    if not target["active"]:
+        return set() if not live["active"] else {"active"}
+    if not live["active"]:
+        return set(ATTRIBUTES)
+
+    changed = set()
+    if (target["width"], target["height"]) != (live["width"], live["height"]) or abs(
+            millihertz(target["refresh"]) - millihertz(live["refresh"])) > 10:
+        changed.add("mode")
+    if (int(target["x"]), int(target["y"])) != (int(live["x"]), int(live["y"])):
+        changed.add("position")
+    if target["transform"] != live["transform"]:
+        changed.add("transform")
+    if live["scale"] is None or abs(float(target["scale"]) - float(live["scale"])) > 0.001:
+        changed.add("scale")
+    # Some compositors don't report these at all
+    if live["scale_filter"] is not None and target["scale_filter"] and target["scale_filter"] != live[
+            "scale_filter"]:
+        changed.add("scale_filter")
+    if target["adaptive_sync"] != live["adaptive_sync"]:
+        changed.add("adaptive_sync")
+    if bool(target["dpms"]) != bool(live["dpms"]):
+        changed.add("dpms")
+    if target["mirror"] is not None and (target["mirror"] or "") != (live["mirror"] or ""):
+        changed.add("mirror")
+    if target["ten_bit"] is not None and bool(target["ten_bit"]) != bool(live["ten_bit"]):
+        changed.add("ten_bit")
+
+    return changed
+
+
+def snap_to_listed_mode(target, modes):
+    """
+    If the output lists the target mode within the tolerance we use for comparison, replaces the target refresh
+    with the exact listed value, so that compositors get a mode they actually support.
+    """
+    if not target["active"] or not modes:
+        return
+    i = modes.find(int(target["width"]), int(target["height"]), millihertz(target["refresh"]), tolerance=10)
+    if i is not None:
+        target["refresh"] = modes.refreshes[i] / 1000
+
+
+def diff_outputs(targets, live_outputs):
+    """
+    Takes {"name": target} and the OutputSnapshot returned by tools.query_outputs(). Returns {"name": set_of_changed_attributes}
+    for outputs that need any change. Outputs missing from the live state are considered completely changed.
+    Target refresh rates are snapped to the modes listed by the output.
+    """
+    result = {}
+    for name, target in targets.items():
+        live = live_outputs.get(name) if live_outputs else None
+        if live is not None:
+            snap_to_listed_mode(target, live.modes)
+        changed = changed_attributes(target, live_from_output(live) if live is not None else None)
+        if changed:
+            result[name] = changed
+
+    return result
+
+
+def sway_command(name, target, changed, custom_mode=False):
+    """Builds an `output` command setting only the changed attributes."""
+    if not target["active"]:
+        return 'output "{}" disable'.format(name)
+
+    if "active" in changed:
+        changed = set(ATTRIBUTES)
+
+    cmd = 'output "{}"'.format(name)
+    if "active" in changed:
+        cmd += " enable"
+    if "mode" in changed:
+        cmd += " mode {} {}x{}@{}Hz".format(
+            "--custom" if custom_mode else "", target["width"], target["height"], target["refresh"]
+        )
+    if "position" in changed:
+        cmd += " pos {} {}".format(target["x"], target["y"])
+    if "transform" in changed:
+        cmd += " transform {}".format(target["transform"])
+    if "scale" in changed:
+        cmd += " scale {}".format(target["scale"])
+    if "scale_filter" in changed and target["scale_filter"]:
+        cmd += " scale_filter {}".format(target["scale_filter"])
+    if "adaptive_sync" in changed:
+        cmd += " adaptive_sync {}".format("on" if target["adaptive_sync"] else "off")
+    if "dpms" in changed:
+        cmd += " dpms {}".format("on" if target["dpms"] else "off")
+
+    return cmd
+
+
+# Our transform names -> niri IPC Transform variants
+NIRI_TRANSFORMS = {
+    "normal": "Normal",
+    "90": "90",
+    "180": "180",
+    "270": "270",
+    "flipped": "Flipped",
+    "flipped-90": "Flipped90",
+    "flipped-180": "Flipped180",
+    "flipped-270": "Flipped270",
+}
+
+
+def niri_actions(target, changed):
+    """Builds the list of niri IPC OutputAction objects setting only the changed attributes."""
+    if not target["active"]:
+        return ["Off"]
+
+    actions = []
+    if "active" in changed:
+        actions.append("On")
+        changed = set(ATTRIBUTES)
+    if "mode" in changed:
+        actions.append({"Mode": {"mode": {"Specific": {
+            "width": int(target["width"]), "height": int(target["height"]), "refresh": float(target["refresh"])
+        }}}})
+    if "scale" in changed:
+        actions.append({"Scale": {"scale": {"Specific": float(target["scale"])}}})
+    if "transform" in changed:
+        actions.append({"Transform": {"transform": NIRI_TRANSFORMS.get(target["transform"], "Normal")}})
+    if "position" in changed:
+        actions.append({"Position": {"position": {"Specific": {"x": int(target["x"]), "y": int(target["y"])}}}})
+    if "adaptive_sync" in changed:
+        actions.append({"Vrr": {"vrr": {"vrr": bool(target["adaptive_sync"]), "on_demand": False}}})
+
+    return actions
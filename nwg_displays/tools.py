@@ -1,19 +1,18 @@
 # !/usr/bin/env python3
 import datetime
+import hashlib
 import json
 import os
+import re
 import shutil
-import socket
+import stat
 import subprocess
 import sys
+import tempfile
 
-import gi
-
-gi.require_version('Gdk', '3.0')
-from gi.repository import Gdk
-
-if os.getenv("SWAYSOCK"):
-    from i3ipc import Connection
+from nwg_displays.backends import detect_backend, get_backend
+from nwg_displays.layout import is_rotated
+from nwg_displays.output_snapshot import OutputSnapshot, OutputState
 
 
 def eprint(*args, **kwargs):
@@ -44,19 +43,8 @@ def niri_msg(cmd):
         return None
     
     try:
-        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        s.connect(niri_socket)
-        request = cmd + "\n"
-        s.send(request.encode("utf-8"))
-        s.shutdown(socket.SHUT_WR)
-        output = ""
-        while True:
-            chunk = s.recv(4096)
-            if not chunk:
-                break
-            output += chunk.decode('utf-8')
-        s.close()
-        return output.strip()
+        from nwg_displays.ipc.niri import get_niri_ipc
+        return json.dumps(get_niri_ipc().request(json.loads(cmd)))
     except Exception as e:
         eprint(f"Error communicating with niri: {e}")
         return None
@@ -73,6 +61,12 @@ def niri_reload_config():
         eprint(f"[niri] Failed to reload config: {e}")
 
 
+def get_outputs_path():
+    """Returns the default path of the outputs config file of the running compositor."""
+    backend = get_backend()
+    return backend.outputs_path() if backend else None
+
+
 def get_config():
     config_dir = get_config_dir()
     config_file = os.path.join(config_dir, "config")
@@ -90,330 +84,60 @@ def get_config():
 
 
 def hyprctl(cmd):
-    # /tmp/hypr moved to $XDG_RUNTIME_DIR/hypr in #5788
-    xdg_runtime_dir = os.getenv("XDG_RUNTIME_DIR")
-    hypr_dir = f"{xdg_runtime_dir}/hypr" if xdg_runtime_dir and os.path.isdir(
-        f"{xdg_runtime_dir}/hypr") else "/tmp/hypr"
-
-    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-    s.connect(f"{hypr_dir}/{os.getenv('HYPRLAND_INSTANCE_SIGNATURE')}/.socket.sock")
-
-    s.send(cmd.encode("utf-8"))
-    output = s.recv(20480).decode('utf-8')
-    s.close()
-
-    return output
+    from nwg_displays.ipc.hyprland import get_hyprland_ipc
+    return get_hyprland_ipc().request(cmd)
 
 
 def is_command(cmd):
     return shutil.which(cmd) is not None
 
 
-def list_outputs():
-    if os.getenv("NIRI_SOCKET"):
-        outputs_dict = {}
-        eprint("Running on niri")
-        
-        try:
-            try:
-                result = subprocess.run(['niri', 'msg', '-j', 'outputs'], 
-                                      capture_output=True, text=True, timeout=5)
-                output = result.stdout
-            except Exception as e:
-                eprint(f"[niri] Failed to run niri msg: {e}")
-                # Fallback to socket communication
-                output = niri_msg('{"Outputs":null}')
-                
-            if not output:
-                eprint("[niri] Could not communicate with niri compositor")
-                return {}
-                
-            data = json.loads(output)
-            
-            # niri msg returns dict directly: {"eDP-1": {...}}
-            # Or via IPC: {"Ok":{"Outputs":{"eDP-1":{...}}}}
-            monitors_dict = None
-            if isinstance(data, dict):
-                if "Ok" in data:
-                    monitors_dict = data.get("Outputs", {})
-                elif "Err" in data:
-                    eprint(f"[niri] Error from compositor: {data['Err']}")
-                    return {}
-                else:
-                    # Direct response from niri msg
-                    monitors_dict = data
-            
-            if monitors_dict is None or not isinstance(monitors_dict, dict):
-                eprint(f"[niri] Unexpected response format: {data}")
-                return {}
-            
-            # monitors_dict is a dict keyed by output name
-            transforms = {"Normal": "normal", "90": "90", "180": "180", "270": "270", 
-                         "Flipped": "flipped", "Flipped90": "flipped-90", 
-                         "Flipped180": "flipped-180", "Flipped270": "flipped-270"}
-            
-            for name, mon in monitors_dict.items():
-                # Get current mode info
-                current_mode_idx = mon.get("current_mode", 0)
-                modes_list = mon.get("modes", [])
-                current_mode = modes_list[current_mode_idx] if modes_list and current_mode_idx < len(modes_list) else {}
-                
-                logical = mon.get("logical", {})
-                
-                # Store raw make/model for accurate matching (not just description)
-                raw_make = mon.get("make", "")
-                raw_model = mon.get("model", "")
-                raw_serial = mon.get("serial")
-                physical_size = mon.get("physical_size", [])
-                
-                # Format description for backward compatibility
-                description = f'{raw_make} {raw_model} {raw_serial or ""}'.strip()
-                
-                outputs_dict[name] = {
-                    "active": True,  # If it's in the list, it's active
-                    "dpms": True,
-                    "description": description,
-                    "x": int(logical.get("x", 0)),
-                    "y": int(logical.get("y", 0)),
-                    "logical-width": int(logical.get("width", 0)),
-                    "logical-height": int(logical.get("height", 0)),
-                    "physical-width": int(current_mode.get("width", 0)),
-                    "physical-height": int(current_mode.get("height", 0)),
-                    "transform": transforms.get(logical.get("transform", "Normal"), "normal"),
-                    "scale": float(logical.get("scale", 1.0)),
-                    "scale_filter": "linear",
-                    "refresh": round(float(current_mode.get("refresh_rate", 60000)) / 1000, 2),
-                    "modes": [],
-                    "focused": mon.get("is_focused", False),
-                    "adaptive_sync_status": "enabled" if mon.get("vrr_enabled", False) else "disabled",
-                    "mirror": "",
-                    "ten_bit": False,
-                    "monitor": None,
-                    # Store raw make/model for matching
-                    "__niri_make": raw_make,
-                    "__niri_model": raw_model,
-                    "__niri_serial": raw_serial,
-                    "__niri_physical_size": physical_size,
-                }
-                
-                # Parse available modes
-                for mode in modes_list:
-                    try:
-                        outputs_dict[name]["modes"].append({
-                            "width": int(mode.get("width", 0)),
-                            "height": int(mode.get("height", 0)),
-                            "refresh": float(mode.get("refresh_rate", 60000))
-                        })
-                    except:
-                        pass
-        except json.JSONDecodeError as e:
-            eprint(f"[niri] JSON decode error: {e}")
-            return {}
-        except Exception as e:
-            eprint(f"Error parsing niri outputs: {e}")
-            # Return empty dict if parsing fails
-            return {}
-            
-    elif os.getenv("SWAYSOCK"):
-        outputs_dict = {}
-        eprint("Running on sway")
-        i3 = Connection()
-        tree = i3.get_tree()
-        for item in tree:
-            if item.type == "output" and not item.name.startswith("__"):
-                outputs_dict[item.name] = {"x": item.rect.x,
-                                           "y": item.rect.y,
-                                           "logical-width": item.rect.width,
-                                           "logical-height": item.rect.height,
-                                           "physical-width": item.ipc_data["current_mode"]["width"],
-                                           "physical-height": item.ipc_data["current_mode"]["height"]}
-
-                outputs_dict[item.name]["active"] = item.ipc_data["active"]
-                outputs_dict[item.name]["dpms"] = item.ipc_data["dpms"]
-                outputs_dict[item.name]["transform"] = item.ipc_data[
-                    "transform"] if "transform" in item.ipc_data else None
-                outputs_dict[item.name]["scale"] = float(item.ipc_data["scale"]) if "scale" in item.ipc_data else None
-                outputs_dict[item.name]["scale_filter"] = item.ipc_data["scale_filter"]
-                outputs_dict[item.name]["adaptive_sync_status"] = item.ipc_data["adaptive_sync_status"]
-                outputs_dict[item.name]["refresh"] = \
-                    item.ipc_data["current_mode"]["refresh"] / 1000 if "refresh" in item.ipc_data[
-                        "current_mode"] else None
-                outputs_dict[item.name]["modes"] = item.ipc_data["modes"] if "modes" in item.ipc_data else []
-                outputs_dict[item.name]["description"] = "{} {} {}".format(item.ipc_data["make"],
-                                                                           item.ipc_data["model"],
-                                                                           item.ipc_data["serial"])
-                outputs_dict[item.name]["focused"] = item.ipc_data["focused"]
-
-                outputs_dict[item.name]["mirror"] = ""  # We only use it on Hyprland
-                outputs_dict[item.name]["ten_bit"] = False  # We have no way to check it on sway
-                outputs_dict[item.name]["monitor"] = None
-
-    elif os.getenv("HYPRLAND_INSTANCE_SIGNATURE"):
-        monitors_all = json.loads(hyprctl("j/monitors all"))
-        monitors = json.loads(hyprctl("j/monitors"))
-        active = []
-        for item in monitors:
-            active.append(item["name"])
-        outputs_dict = {}
-        for mon in monitors_all:
-            name = mon["name"]
-            outputs_dict[name] = {"active": True} if name in active else {"active": False}
-
-        eprint("Running on Hyprland")
-
-        # 1. Mirroring is impossible to check in any way. We need to parse back the monitors.conf file, and it sucks.
-        mirrors = {}
-        hypr_config_dir = os.path.join(get_config_home(), "hypr")
-        monitors_file = os.path.join(hypr_config_dir, "monitors.conf")
-        if os.path.isfile(monitors_file):
-            lines = load_text_file(monitors_file).splitlines()
-            for line in lines:
-                if line and not line.startswith("#"):  # skip comments
-                    if "mirror" in line:
-                        settings = line.split("=")[1].split(",")
-                        mirrors[settings[0].strip()] = settings[-1].strip()
-
-        # 2. This won't work w/ Hyprland <= 0.36.0
-        output = hyprctl("j/monitors all")
-        monitors = json.loads(output)
-        transforms = {0: "normal", 1: "90", 2: "180", 3: "270", 4: "flipped", 5: "flipped-90", 6: "flipped-180",
-                      7: "flipped-270"}
-        for m in monitors:
-            outputs_dict[m["name"]]["mirror"] = mirrors[name] if name in mirrors else ""
-
-            outputs_dict[m["name"]]["scale_filter"] = None
-            outputs_dict[m["name"]]["modes"] = []
-            outputs_dict[m["name"]]["focused"] = m["focused"]
-            outputs_dict[m["name"]]["adaptive_sync_status"] = "enabled" if m["vrr"] else "disabled"
-
-            outputs_dict[m["name"]]["description"] = f'{m["description"]}'
-            outputs_dict[m["name"]]["x"] = int(m["x"])
-            outputs_dict[m["name"]]["y"] = int(m["y"])
-
-            outputs_dict[m["name"]]["refresh"] = round(m["refreshRate"], 2)
+# How long (in seconds) a compositor query may be reused by callers that accept a cached result
+SNAPSHOT_TTL = 1.0
 
-            outputs_dict[m["name"]]["logical-width"] = m["width"] / m["scale"]
-            outputs_dict[m["name"]]["logical-height"] = m["height"] / m["scale"]
+# The last compositor query, shared by all the callers
+_snapshot = None
 
-            outputs_dict[m["name"]]["physical-width"] = m["width"]
-            outputs_dict[m["name"]]["physical-height"] = m["height"]
 
-            outputs_dict[m["name"]]["transform"] = transforms[m["transform"]]
-            outputs_dict[m["name"]]["scale"] = m["scale"]
-            outputs_dict[m["name"]]["focused"] = m["focused"]
-            outputs_dict[m["name"]]["dpms"] = m["dpmsStatus"]
+def query_outputs(max_age=0.0):
+    """
+    Returns an OutputSnapshot of all the outputs known to the compositor, inactive included. Doesn't touch Gdk,
+    so that it can also be used without a GUI. The last snapshot is reused if it's not older than `max_age` seconds.
+    """
+    global _snapshot
+    if _snapshot is not None and _snapshot.age() <= max_age:
+        return _snapshot
 
-            outputs_dict[name]["modes"] = []
+    outputs_dict = _query_compositor()
+    _snapshot = OutputSnapshot({name: OutputState.from_dict(name, outputs_dict[name]) for name in outputs_dict})
 
-            for item in m["availableModes"]:
-                line = item[:-2]  # split "Hz"
-                w_h, r = line.split("@")
-                w, h = w_h.split("x")
-                try:
-                    mode = {"width": int(w), "height": int(h), "refresh": float(r) * 1000}
-                except ValueError as e:
-                    eprint(e)
-                outputs_dict[m["name"]]["modes"].append(mode)
+    return _snapshot
 
-            outputs_dict[m["name"]]["ten_bit"] = True if m["currentFormat"] in ["XRGB2101010", "XBGR2101010"] else False
 
-            # to identify Gdk.Monitor
-            outputs_dict[m["name"]]["model"] = m["model"]
+def invalidate_outputs():
+    """Drops the cached snapshot, e.g. after we've just reconfigured outputs, or on output events."""
+    global _snapshot
+    _snapshot = None
 
-            outputs_dict[m["name"]]["monitor"] = None
 
-    else:
+def _query_compositor():
+    backend = get_backend()
+    if backend is None:
         eprint("This program only supports sway, Hyprland and niri, and we seem to be elsewhere, terminating.")
         sys.exit(1)
 
-    # We used to assign Gdk.Monitor to output on the basis of x and y coordinates, but it no longer works,
-    # starting from gtk3-1:3.24.42: all monitors have x=0, y=0. This is most likely a bug, but from now on
-    # we must rely on gdk monitors order.
-    # For niri, we use property-based matching to avoid order issues after config reload.
-    monitors = []
-    display = Gdk.Display.get_default()
-    for i in range(display.get_n_monitors()):
-        monitor = display.get_monitor(i)
-        monitors.append(monitor)
-
-    if os.getenv("NIRI_SOCKET"):
-        # Niri: Use position-based matching with Gdk.Monitor geometry
-        # This ensures correct matching even when multiple monitors have identical properties
-        for key in outputs_dict:
-            if key in outputs_dict:
-                data = outputs_dict[key]
-                output_x = data.get("x", 0)
-                output_y = data.get("y", 0)
-                
-                # Find matching monitor by position (x, y coordinates)
-                matched = False
-                for m in monitors:
-                    try:
-                        geom = m.get_geometry()
-                        gdk_x = geom.x
-                        gdk_y = geom.y
-                        # Check if positions match (allow small tolerance)
-                        if abs(gdk_x - output_x) < 10 and abs(gdk_y - output_y) < 10:
-                            outputs_dict[key]["monitor"] = m
-                            matched = True
-                            break
-                    except:
-                        pass
-                
-                # Fallback to index-based if position matching fails
-                if not matched:
-                    idx = 0
-                    for k in outputs_dict:
-                        if k == key:
-                            break
-                        idx += 1
-                    if idx < len(monitors):
-                        outputs_dict[key]["monitor"] = monitors[idx]
-    else:
-        # Sway/Hyprland: Keep original index-based matching
-        idx = 0
-        for key in outputs_dict:
-            try:
-                outputs_dict[key]["monitor"] = monitors[idx]
-            except IndexError:
-                print(f"Couldn't assign a Gdk.Monitor to {outputs_dict[key]}")
-            idx += 1
-
-    for key in outputs_dict:
-        eprint(key, outputs_dict[key])
-    return outputs_dict
-
+    return backend.query_outputs()
 
-def list_outputs_activity():
-    result = {}
-    if os.getenv("NIRI_SOCKET"):
-        outputs = list_outputs()
-        for name in outputs:
-            result[name] = outputs[name].get("active", True)
-    elif os.getenv("SWAYSOCK"):
-        i3 = Connection()
-        outputs = i3.get_outputs()
-        for o in outputs:
-            result[o.name] = o.active
-
-    elif os.getenv("HYPRLAND_INSTANCE_SIGNATURE"):
-        monitors_all = json.loads(hyprctl("j/monitors all"))
-        monitors = json.loads(hyprctl("j/monitors"))
-        active = []
-        for item in monitors:
-            active.append(item["name"])
-
-        for mon in monitors_all:
-            name = mon["name"]
-            result[name] = True if name in active else False
 
-    return result
+def list_outputs_activity(max_age=SNAPSHOT_TTL):
+    """Returns the "name": is_active dictionary, derived from the last compositor query, if fresh enough."""
+    return query_outputs(max_age).activity()
 
 
 def max_window_height():
-    if os.getenv("SWAYSOCK"):
-        i3 = Connection()
-        outputs = i3.get_outputs()
+    if detect_backend() == "sway":
+        from nwg_displays.ipc.sway import get_sway_ipc
+        outputs = get_sway_ipc().get_outputs()
         for o in outputs:
             if o.focused:
                 if o.rect.width > o.rect.height:
@@ -425,8 +149,9 @@ def max_window_height():
 
 def scale_if_floating():
     pid = os.getpid()
-    if os.getenv("SWAYSOCK"):
-        i3 = Connection()
+    if detect_backend() == "sway":
+        from nwg_displays.ipc.sway import get_sway_ipc
+        i3 = get_sway_ipc()
         node = i3.get_tree().find_by_pid(pid)[0]
         if node.type == "floating_con":
             h = int(max_window_height())
@@ -461,17 +186,11 @@ def orientation_changed(transform, transform_old):
             is_rotated(transform_old) and not is_rotated(transform))
 
 
-def is_rotated(transform):
-    return "90" in transform or "270" in transform
-
-
 def inactive_output_description(name):
-    if os.getenv("SWAYSOCK"):
-        i3 = Connection()
-        for item in i3.get_outputs():
-            if item.name == name:
-                return "{} {} {}".format(item.ipc_data["make"], item.ipc_data["model"],
-                                         item.ipc_data["serial"])
+    if detect_backend() == "sway":
+        output = query_outputs(SNAPSHOT_TTL).get(name)
+        if output:
+            return output.description
     return None
 
 
@@ -485,6 +204,7 @@ def config_keys_missing(config, config_file):
         "use-desc": False,
         "confirm-timeout": 10,
         "profile-bound-wallpapers": True,
+        "live-apply": True,
     }
     for key in defaults:
         if key not in config:
@@ -507,68 +227,89 @@ def load_json(path):
         return None
 
 
+# "Generated by ... on <date> at <time>" headers, which change on every write
+GENERATED_HEADER = re.compile(r"^(#|//) Generated by .+ on \d{4}-\d{2}-\d{2} at \d{2}:\d{2}:\d{2}\. Do not edit manually\.$")
+
+
+def _content_digest(text):
+    lines = [line for line in text.splitlines() if not GENERATED_HEADER.match(line)]
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def write_file_atomic(path, text):
+    """
+    Replaces the content of the file at `path` (or at its symlink target) atomically: a temp file in the same
+    directory is written, fsync'ed and renamed over the target, so that file watchers never see it half-written.
+    The write is skipped if the content, ignoring the "Generated by" header, is unchanged.
+    Returns True if the file has been written.
+    """
+    real_path = os.path.realpath(path)
+    try:
+        with open(real_path, "r") as f:
+            if _content_digest(f.read()) == _content_digest(text):
+                return False
+        mode = stat.S_IMODE(os.stat(real_path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(real_path), prefix=".{}.".format(os.path.basename(real_path)))
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, real_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    return True
+
+
 def save_json(src_dict, path):
-    with open(path, 'w') as f:
-        json.dump(src_dict, f, indent=2)
+    return write_file_atomic(path, json.dumps(src_dict, indent=2))
 
 
 def save_list_to_text_file(data, file_path):
-    text_file = open(file_path, "w")
-    for line in data:
-        text_file.write(line + "\n")
-    text_file.close()
+    return write_file_atomic(file_path, "".join(line + "\n" for line in data))
 
 
-def save_kdl_output(data, file_path):
-    """Save output configuration in KDL format for niri"""
-    text_file = open(file_path, "w")
+def save_kdl_output(lines, file_path):
+    """Save output configuration lines (see generators.niri_config) in KDL format for niri"""
     now = datetime.datetime.now()
     line = "// Generated by nwg-displays on {} at {}. Do not edit manually.\n".format(
         datetime.datetime.strftime(now, '%Y-%m-%d'),
         datetime.datetime.strftime(now, '%H:%M:%S'))
-    text_file.write(line + "\n")
-    
-    for d in data:
-        name = d["name"]
-        if not d["active"]:
-            text_file.write(f'output "{name}" {{\n    off\n}}\n\n')
-            continue
-        
-        text_file.write(f'output "{name}" {{\n')
-        
-        # Mode
-        text_file.write(f'    mode "{d["physical_width"]}x{d["physical_height"]}@{d["refresh"]}"\n')
-        
-        # Scale
-        text_file.write(f'    scale {d["scale"]}\n')
-        
-        # Transform
-        if d["transform"] != "normal":
-            text_file.write(f'    transform "{d["transform"]}"\n')
-        
-        # Position
-        text_file.write(f'    position x={d["x"]} y={d["y"]}\n')
-        
-        # Variable refresh rate (adaptive sync)
-        if d.get("adaptive_sync", False):
-            text_file.write(f'    variable-refresh-rate\n')
-        
-        text_file.write(f'}}\n\n')
-    
-    text_file.close()
+    return save_list_to_text_file([line] + lines, file_path)
+
+
+# config.kdl path -> its mtime, when we last found the include directive there
+_niri_include_checked = {}
 
 
 def ensure_niri_config_include(config_dir, monitors_file):
     """Ensure that config.kdl includes monitor.kdl"""
     config_kdl = os.path.join(config_dir, "config.kdl")
     monitors_rel_path = "monitor.kdl"
-    
+
+    # Don't re-read config.kdl if it hasn't changed since we last checked it
+    try:
+        if _niri_include_checked.get(config_kdl) == os.stat(config_kdl).st_mtime_ns:
+            return
+    except OSError:
+        pass
+
     # Check if config.kdl exists
     if not os.path.isfile(config_kdl):
         # Create a minimal config.kdl with include
-        with open(config_kdl, "w") as f:
-            f.write(f'// Include monitor configuration generated by nwg-displays\n')
-            f.write(f'include "{monitors_rel_path}"\n')
+        write_file_atomic(config_kdl, f'// Include monitor configuration generated by nwg-displays\n'
+                                       f'include "{monitors_rel_path}"\n')
         eprint(f"[niri] Created {config_kdl} with include directive")
         return
     
@@ -586,13 +327,13 @@ def ensure_niri_config_include(config_dir, monitors_file):
     for line in lines:
         if include_pattern in line or include_pattern_single in line:
             # Already included
+            _niri_include_checked[config_kdl] = os.stat(config_kdl).st_mtime_ns
             return
     
     # Add include directive at the beginning
     new_content = f'// Include monitor configuration generated by nwg-displays\ninclude "{monitors_rel_path}"\n\n{content}'
     
-    with open(config_kdl, "w") as f:
-        f.write(new_content)
+    write_file_atomic(config_kdl, new_content)
     
     eprint(f"[niri] Added include directive to {config_kdl}")
 
@@ -669,19 +410,18 @@ def load_workspaces_hypr(path, num_ws=0):
 
 
 def save_workspaces(data_dict, path, use_desc=False):
-    text_file = open(path, "w")
     now = datetime.datetime.now()
     line = "# Generated by nwg-displays on {} at {}. Do not edit manually.\n".format(
         datetime.datetime.strftime(now, '%Y-%m-%d'),
         datetime.datetime.strftime(now, '%H:%M:%S'))
-    text_file.write(line + "\n")
+    lines = [line]
     for key in data_dict:
         if not use_desc:
             line = "workspace {} output {}".format(key, data_dict[key])
         else:
             line = "workspace {} output '{}'".format(key, data_dict[key])
-        text_file.write(line + "\n")
-    text_file.close()
+        lines.append(line)
+    return save_list_to_text_file(lines, path)
 
 
 def notify(summary, body, timeout=3000):
@@ -1,40 +1,79 @@
 import os
+import signal
 import stat
 import subprocess
 import json
-import time
+from concurrent.futures import ThreadPoolExecutor
 
-# from nwg_displays.main import sway
-from nwg_displays.tools import is_command, load_text_file
+from nwg_displays.backends import get_backend
+from nwg_displays.tools import is_command, load_text_file, save_list_to_text_file
+
+# Wallpapers of up to this many outputs are set concurrently
+MAX_WORKERS = 4
+# Seconds to wait for a single wallpaper command
+COMMAND_TIMEOUT = 10
+
+
+# azotebg file path -> (mtime_ns, size, wallpapers parsed out of it)
+_azotebg_cache = {}
+
+
+def _expand(path):
+    return os.path.expanduser(os.path.expandvars(path))
+
+
+def _copy(wallpapers):
+    return {name: dict(wallpaper) for name, wallpaper in wallpapers.items()}
 
 
 class WallpaperManager:
     @staticmethod
     def get_current_wallpapers():
-        """Returns a dict containing path and mode fields attached to monitor names. For swww mode fields are empty."""
+        """
+        Returns a dict containing path and mode fields attached to monitor names. For swww mode fields are empty.
+        The azotebg file is only parsed again if it changed; swww is always queried, as other tools may change
+        wallpapers.
+        """
         if not is_command("nwg-shell") and not is_command("swww"):
             return {}
 
         # Firstly we need to support nwg-shell-related wallpapers, and we use Azote Wallpaper Manager here.
         # Let's parse the ~/.azotebg or ~/azotebg-hyprland batch file.
-        if is_command("nwg-shell") and (os.getenv("SWAYSOCK") or os.getenv("HYPRLAND_INSTANCE_SIGNATURE")):
-            if os.getenv("SWAYSOCK"):
-                azotebg_file = os.path.join(os.getenv("HOME"), ".azotebg")
-            else:
-                azotebg_file = os.path.join(os.getenv("HOME"), ".azotebg-hyprland")
-            azotebg_content = load_text_file(azotebg_file)
-            if azotebg_content:
-                return WallpaperManager.parse_azotebg_content(azotebg_content)
-            else:
+        backend = get_backend()
+        if is_command("nwg-shell") and backend and backend.azotebg_file:
+            current_walls = WallpaperManager._read_azotebg(os.path.join(os.getenv("HOME"), backend.azotebg_file))
+            if current_walls is None:
                 print(f"[Error] Couldn't find ~/.azotebg* file")
                 return {}
+            return current_walls
         else:
-            try:
-                output = subprocess.check_output(["swww", "query"], text=True)
-                return WallpaperManager._parse_swww_output(output)
-            except Exception as e:
-                print(f"[Error] Failed to query swww: {e}")
-                return {}
+            return WallpaperManager._query_swww()
+
+    @staticmethod
+    def _read_azotebg(path):
+        """Returns wallpapers of the azotebg file, or None if it's missing or empty."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        key = (st.st_mtime_ns, st.st_size)
+        cached = _azotebg_cache.get(path)
+        if cached is None or cached[0] != key:
+            content = load_text_file(path)
+            cached = (key, WallpaperManager.parse_azotebg_content(content) if content else None)
+            _azotebg_cache[path] = cached
+
+        return _copy(cached[1]) if cached[1] is not None else None
+
+    @staticmethod
+    def _query_swww():
+        try:
+            output = subprocess.check_output(["swww", "query"], text=True, timeout=COMMAND_TIMEOUT)
+            return WallpaperManager._parse_swww_output(output)
+        except Exception as e:
+            print(f"[Error] Failed to query swww: {e}")
+            return {}
 
     @staticmethod
     def parse_azotebg_content(content):
@@ -90,61 +129,160 @@ class WallpaperManager:
         return current_walls
 
     @staticmethod
-    def apply_wallpapers(wallpaper_data):
+    def apply_wallpapers(wallpaper_data, cancelled=None):
+        """
+        Sets wallpapers of the outputs whose wallpaper differs from the current one. Returns {"name": (ok, message)}
+        of the outputs touched. Skips the wallpapers not applied yet, if `cancelled()` turns True, e.g. when a newer
+        apply is queued.
+        """
         if not wallpaper_data:
-            return
+            return {}
+        if cancelled and cancelled():
+            print("[Wallpapers] Cancelled")
+            return {}
 
         if is_command("nwg-shell"):
-            WallpaperManager._apply_azotebg(wallpaper_data)
-            return
+            return WallpaperManager._apply_azotebg(wallpaper_data, cancelled)
 
         if is_command("swww"):
-            WallpaperManager._apply_swww(wallpaper_data)
-            return
+            return WallpaperManager._apply_swww(wallpaper_data, cancelled)
 
         if is_command("hyprpaper"):
             WallpaperManager._apply_hyprpaper()
-            return
+            return {}
 
         print("[Error] No wallpaper daemon found (swww/hyprpaper/swaybg)")
+        return {}
 
     @staticmethod
-    def _apply_azotebg(wallpaper_data):
+    def changed_wallpapers(wallpaper_data, current, compare_mode=True):
+        """Returns the part of `wallpaper_data` that differs from the `current` wallpapers."""
+        changed = {}
+        for name, wallpaper in wallpaper_data.items():
+            now = current.get(name)
+            if now and _expand(now["path"]) == _expand(wallpaper["path"]) and (
+                    not compare_mode or now.get("mode") == wallpaper.get("mode")):
+                continue
+            changed[name] = wallpaper
+
+        return changed
+
+    @staticmethod
+    def _run_parallel(task, wallpaper_data, cancelled=None):
+        """
+        Calls `task(name, wallpaper)` for all the outputs concurrently, on a bounded pool of threads. Tasks return
+        (ok, message). Returns and reports {"name": (ok, message)}.
+        """
+        def run(name):
+            if cancelled and cancelled():
+                return False, "cancelled"
+            try:
+                return task(name, wallpaper_data[name])
+            except (OSError, subprocess.SubprocessError) as e:
+                return False, str(e)
+
+        if not wallpaper_data:
+            print("[Wallpapers] Already set")
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(wallpaper_data))) as pool:
+            results = dict(zip(wallpaper_data, pool.map(run, wallpaper_data)))
+
+        for name, (ok, message) in results.items():
+            print(f"[Wallpapers] {name}: {'ok' if ok else 'failed'}{': ' + message if message else ''}")
+
+        return results
+
+    @staticmethod
+    def _azotebg_path():
+        backend = get_backend()
+        return os.path.join(os.getenv("HOME"), backend.azotebg_file if backend and backend.azotebg_file
+                            else ".azotebg-hyprland")
+
+    @staticmethod
+    def _apply_azotebg(wallpaper_data, cancelled=None):
         print("[Wallpapers] Using nwg-shell/Azote/swaybg backend")
+        azotebg_file = WallpaperManager._azotebg_path()
+
+        current = WallpaperManager._read_azotebg(azotebg_file) or {}
+        running = WallpaperManager._swaybg_processes()
+        changed = WallpaperManager.changed_wallpapers(wallpaper_data, current)
+        # The batch file may say what we want, while swaybg is not running there
+        for name in wallpaper_data:
+            if name not in running:
+                changed[name] = wallpaper_data[name]
+
+        # The batch file (re)starts all of them, e.g. on login
         batch_content = ['#!/usr/bin/env bash', 'pkill swaybg']
         for key in wallpaper_data:
             batch_content.append(f"swaybg -o '{key}' -i \"{wallpaper_data[key]['path']}\" -m {wallpaper_data[key]['mode']} &")
-        print("\n".join(batch_content))
-
-        if os.getenv("SWAYSOCK"):
-            azotebg_file = os.path.join(os.getenv("HOME"), ".azotebg")
-        else:
-            azotebg_file = os.path.join(os.getenv("HOME"), ".azotebg-hyprland")
 
         # write to .azotebg* file
-        with open(azotebg_file, 'w') as f:
-            for item in batch_content:
-                f.write("%s\n" % item)
+        if save_list_to_text_file(batch_content, azotebg_file):
+            print("\n".join(batch_content))
         # make the file executable
         st = os.stat(azotebg_file)
         os.chmod(azotebg_file, st.st_mode | stat.S_IEXEC)
-        # execute
-        subprocess.call(azotebg_file, shell=True)
+
+        # Only restart swaybg on the outputs whose wallpaper changed
+        return WallpaperManager._run_parallel(
+            lambda name, wallpaper: WallpaperManager._set_swaybg(name, wallpaper, running.get(name, [])),
+            changed, cancelled)
 
     @staticmethod
-    def _apply_swww(wallpaper_data):
+    def _swaybg_processes():
+        """Returns {"output_name": [pid]} of running swaybg instances."""
+        processes = {}
+        try:
+            output = subprocess.run(["pgrep", "-a", "swaybg"], capture_output=True, text=True,
+                                    timeout=COMMAND_TIMEOUT).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"[Error] Failed to list swaybg processes: {e}")
+            return processes
+
+        # e.g. "1234 swaybg -o DP-1 -i /path/to/wallpaper.jpg -m fill"
+        for line in output.splitlines():
+            fields = line.split()
+            if len(fields) > 3 and os.path.basename(fields[1]) == "swaybg" and "-o" in fields[:-1]:
+                name = fields[fields.index("-o") + 1]
+                processes.setdefault(name, []).append(int(fields[0]))
+
+        return processes
+
+    @staticmethod
+    def _set_swaybg(name, wallpaper, pids):
+        # Check it first: better keep the old wallpaper than leave the output blank
+        path = _expand(wallpaper["path"])
+        if not os.path.isfile(path):
+            return False, f"file not found: {path}"
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        subprocess.Popen(["swaybg", "-o", name, "-i", path, "-m", wallpaper.get("mode") or "fill"],
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        return True, ""
+
+    @staticmethod
+    def _apply_swww(wallpaper_data, cancelled=None):
         print("[Wallpapers] Using swww backend")
-        # for monitor, path in wallpaper_data.items():
-        for key in wallpaper_data:
-            path = wallpaper_data[key]["path"]
-            path = os.path.expanduser(os.path.expandvars(path))
-            if os.path.isfile(path):
-                print(f"[Wallpapers] Setting {key} to {path}")
-                # Using 'grow' transition for smooth profile switching
-                cmd = f"swww img -o {key} '{path}' --transition-type grow --transition-pos 0.8,0.9 --transition-step 90"
-                os.system(cmd)
-            else:
-                print(f"[Warning] Wallpaper file not found: {path}")
+        # Query it fresh: someone else might have changed wallpapers in the meantime
+        changed = WallpaperManager.changed_wallpapers(wallpaper_data, WallpaperManager._query_swww(),
+                                                      compare_mode=False)
+        return WallpaperManager._run_parallel(WallpaperManager._set_swww, changed, cancelled)
+
+    @staticmethod
+    def _set_swww(name, wallpaper):
+        path = _expand(wallpaper["path"])
+        if not os.path.isfile(path):
+            return False, f"file not found: {path}"
+        # Using 'grow' transition for smooth profile switching
+        result = subprocess.run(
+            ["swww", "img", "-o", name, path, "--transition-type", "grow", "--transition-pos", "0.8,0.9",
+             "--transition-step", "90"],
+            capture_output=True, text=True, timeout=COMMAND_TIMEOUT)
+        return result.returncode == 0, result.stderr.strip()
 
     @staticmethod
     def _apply_hyprpaper():
@@ -152,15 +290,17 @@ class WallpaperManager:
         pass
 
     @staticmethod
-    def apply_profile_wallpapers(config_dir, profile_name):
+    def apply_profile_wallpapers(config_dir, profile_name, cancelled=None):
         profile_path = os.path.join(config_dir, "profiles", f"{profile_name}.json")
         if os.path.isfile(profile_path):
             try:
                 with open(profile_path, "r") as f:
                     profile_data = json.load(f)
                 if "wallpapers" in profile_data:
+                    # Imported here, as readiness depends on the settings_applier package, which depends on us
+                    from nwg_displays.readiness import wait_for_activity
+                    wait_for_activity({name: True for name in profile_data["wallpapers"]}, cancelled=cancelled)
                     print("[Profile] Applying wallpapers...")
-                    time.sleep(1)
-                    WallpaperManager.apply_wallpapers(profile_data["wallpapers"])
+                    WallpaperManager.apply_wallpapers(profile_data["wallpapers"], cancelled)
             except Exception as e:
                 print(f"[Error] Failed to apply wallpapers from profile: {e}")
@@ -13,7 +13,7 @@ setup(
     description="nwg-shell output configuration utility",
     packages=find_packages(),
     include_package_data=True,
-    package_data={"": ["resources/*", "langs/*", "scripts/*", "settings_applier/*", "wallpaper_manager/*"]},
+    package_data={"": ["resources/*", "langs/*", "scripts/*", "settings_applier/*", "wallpaper_manager/*", "ipc/*", "backends/*"]},
     url="https://github.com/nwg-piotr/nwg-displays",
     license="MIT",
     author="Piotr Miller",
@@ -27,6 +27,7 @@ setup(
         "console_scripts": [
             "nwg-displays-apply = nwg_displays.scripts.apply_profile_json:main",
             "nwg-displays-toggle-wallpapers = nwg_displays.scripts.toggle_profile_wallpapers:main",
+            "nwg-displays-daemon = nwg_displays.scripts.profile_daemon:main",
         ],
     },
 )
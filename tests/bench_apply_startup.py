@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+"""
+Cold start of nwg-displays-apply: the time a fresh interpreter needs to import the script, and the heavy modules
+it pulls in. Nothing is applied, so this runs w/o a compositor. For comparison, the same is measured for `gi` w/ Gdk
+(what the applier used to load), if installed.
+
+    python -m tests.bench_apply_startup [-r REPEAT]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPLY = "import nwg_displays.scripts.apply_profile_json"
+GDK = "import gi; gi.require_version('Gdk', '3.0'); from gi.repository import Gdk"
+# Modules nwg-displays-apply should not need to load
+HEAVY = ("gi", "i3ipc", "nwg_displays.ipc.hyprland", "nwg_displays.ipc.niri", "nwg_displays.ipc.sway")
+
+
+def run(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+
+
+def cold_start(code, repeat):
+    """Returns the best wall time of `repeat` fresh interpreters running `code`, in seconds, or None on failure."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if run(code).returncode != 0:
+            return None
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the nwg-displays-apply cold start")
+    parser.add_argument("-r", "--repeat", type=int, default=10, help="Fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    for label, code in (("python", "pass"), ("nwg-displays-apply", APPLY), ("gi + Gdk", GDK)):
+        elapsed = cold_start(code, args.repeat)
+        print("{:<20} {}".format(label, "n/a" if elapsed is None else "{:.1f} ms".format(elapsed * 1000)))
+
+    loaded = run(APPLY + "; import sys; print(' '.join(m for m in {!r} if m in sys.modules))".format(HEAVY))
+    print("Heavy modules loaded by nwg-displays-apply: {}".format(loaded.stdout.strip() or "none"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+"""
+Throughput of the config generators and parsers over synthetic layouts.
+
+    python -m tests.bench_generators [-n LAYOUTS] [-o MAX_OUTPUTS]
+"""
+
+import argparse
+import random
+import time
+
+from nwg_displays.generators import (hyprland_config, niri_config, parse_hyprland_config, parse_niri_config,
+                                     parse_sway_config, sway_config)
+from nwg_displays.layout import Layout
+
+MODES = [(1920, 1080, 60.0), (2560, 1440, 143.998), (3840, 2160, 59.997), (2560, 1600, 165.0), (1280, 1024, 75.025)]
+TRANSFORMS = ["normal", "90", "180", "270", "flipped", "flipped-90", "flipped-180", "flipped-270"]
+
+
+def synthetic_layout(rng, max_outputs):
+    displays = []
+    x = 0
+    for i in range(rng.randint(1, max_outputs)):
+        width, height, refresh = rng.choice(MODES)
+        scale = rng.choice([1.0, 1.25, 1.5, 2.0])
+        displays.append({
+            "name": "DP-{}".format(i + 1),
+            "description": "Vendor Model {:08X}".format(rng.getrandbits(32)),
+            "x": x,
+            "y": rng.choice([0, 0, -240, 360]),
+            "physical_width": width,
+            "physical_height": height,
+            "refresh": refresh,
+            "scale": scale,
+            "transform": rng.choice(TRANSFORMS),
+            "adaptive_sync": rng.random() < 0.3,
+            "ten_bit": rng.random() < 0.2,
+            "active": rng.random() < 0.9,
+        })
+        x += int(width / scale)
+    return Layout.from_displays(displays)
+
+
+def bench(label, func, items):
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    elapsed = time.perf_counter() - start
+    print("{:<15} {:>10.0f} layouts/s  {:>8.1f} us/layout".format(
+        label, len(items) / elapsed, elapsed / len(items) * 1e6))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the config generators and parsers")
+    parser.add_argument("-n", "--layouts", type=int, default=5000, help="Number of synthetic layouts")
+    parser.add_argument("-o", "--max-outputs", type=int, default=6, help="Maximum outputs per layout")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    layouts = [synthetic_layout(rng, args.max_outputs) for _ in range(args.layouts)]
+    print("{} layouts, {} outputs".format(len(layouts), sum(len(layout) for layout in layouts)))
+
+    for name, generate, parse in (("sway", sway_config, parse_sway_config),
+                                  ("hyprland", hyprland_config, parse_hyprland_config),
+                                  ("niri", niri_config, parse_niri_config)):
+        configs = bench(name, generate, layouts)
+        parsed = bench(name + " parse", parse, configs)
+        # Round trip: what the parser returns must generate the very same config
+        for lines, displays in zip(configs, parsed):
+            assert generate(Layout.from_displays(displays)) == lines, name
+
+
+if __name__ == "__main__":
+    main()
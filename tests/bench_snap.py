@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+"""
+Per-event cost of snapping a dragged output against the number of outputs. The old way rebuilt and scanned the edge
+lists on every motion event; now Layout.snap_edges() runs once at button press, and motion events only bisect.
+
+    python -m tests.bench_snap [-e EVENTS]
+"""
+
+import argparse
+import random
+import time
+
+from nwg_displays.layout import Layout, nearest_snap_edge
+
+OUTPUT_COUNTS = [2, 4, 8, 16, 32, 64]
+VIEW_SCALE = 0.15
+THRESHOLD = 10 * VIEW_SCALE
+
+
+def synthetic_layout(count):
+    displays = []
+    for i in range(count):
+        displays.append({"name": "DP-{}".format(i + 1), "x": 1920 * (i % 8), "y": 1080 * (i // 8),
+                         "physical_width": 1920, "physical_height": 1080, "refresh": 60.0})
+    return Layout.from_displays(displays)
+
+
+def old_snap(layout, dragged, x, y):
+    """The old way: collect the edges w/ `not in` dedupe, and scan them linearly four times."""
+    snap_x, snap_y = [0], [0]
+    for o in layout:
+        if o.name == dragged.name:
+            continue
+        for values, val in ((snap_x, o.x * VIEW_SCALE), (snap_x, (o.x + o.logical_width) * VIEW_SCALE),
+                            (snap_y, o.y * VIEW_SCALE), (snap_y, (o.y + o.logical_height) * VIEW_SCALE)):
+            if val not in values:
+                values.append(val)
+
+    snap_h, snap_v = None, None
+    w = dragged.logical_width * VIEW_SCALE
+    h = dragged.logical_height * VIEW_SCALE
+    for value in snap_x:
+        if abs(x - value) < THRESHOLD:
+            snap_h = value
+            break
+    for value in snap_x:
+        if abs(w + x - value) < THRESHOLD:
+            snap_h = value - w
+            break
+    for value in snap_y:
+        if abs(y - value) < THRESHOLD:
+            snap_v = value
+            break
+    for value in snap_y:
+        if abs(h + y - value) < THRESHOLD:
+            snap_v = value - h
+            break
+    return snap_h, snap_v
+
+
+def new_snap(snap_x, snap_y, dragged, x, y):
+    """As flush_drag() does it, on the edges precomputed at button press."""
+    w = dragged.logical_width * VIEW_SCALE
+    h = dragged.logical_height * VIEW_SCALE
+    snap_h = nearest_snap_edge(snap_x, x, THRESHOLD)
+    edge = nearest_snap_edge(snap_x, x + w, THRESHOLD)
+    if edge is not None:
+        snap_h = edge - w
+    snap_v = nearest_snap_edge(snap_y, y, THRESHOLD)
+    edge = nearest_snap_edge(snap_y, y + h, THRESHOLD)
+    if edge is not None:
+        snap_v = edge - h
+    return snap_h, snap_v
+
+
+def per_event(func, events):
+    start = time.perf_counter()
+    for x, y in events:
+        func(x, y)
+    return (time.perf_counter() - start) / len(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of snapping a dragged output")
+    parser.add_argument("-e", "--events", type=int, default=20000, help="Motion events per measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print("{:>8} {:>14} {:>14}".format("outputs", "old us/event", "new us/event"))
+    for count in OUTPUT_COUNTS:
+        layout = synthetic_layout(count)
+        dragged = layout.outputs[0]
+        width = 1920 * min(count, 8) * VIEW_SCALE
+        height = 1080 * ((count + 7) // 8) * VIEW_SCALE
+        events = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(args.events)]
+
+        snap_x, snap_y = layout.snap_edges(dragged.name, VIEW_SCALE)
+        old = per_event(lambda x, y: old_snap(layout, dragged, x, y), events)
+        new = per_event(lambda x, y: new_snap(snap_x, snap_y, dragged, x, y), events)
+        print("{:>8} {:>14.2f} {:>14.2f}".format(count, old * 1e6, new * 1e6))
+
+
+if __name__ == "__main__":
+    main()
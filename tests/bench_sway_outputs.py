@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+"""
+Cost of building the sway output model against the size of the container tree. The old way walked a GET_TREE reply,
+which grows w/ every window; SwayIpc.list_outputs() builds the model from a GET_OUTPUTS reply, which doesn't.
+Replies are synthesized, so this runs w/o sway: it measures decoding them, and building the model in Python.
+
+    python -m tests.bench_sway_outputs [-o OUTPUTS] [-r REPEAT]
+"""
+
+import argparse
+import json
+import time
+
+from nwg_displays.ipc.sway import SwayIpc
+
+WINDOW_COUNTS = [0, 100, 500, 1000, 5000]
+
+
+def output_data(i, active=True):
+    mode = {"width": 2560, "height": 1440, "refresh": 143998}
+    return {
+        "id": i + 1, "type": "output", "name": "DP-{}".format(i + 1), "active": active, "dpms": True, "power": True,
+        "make": "Vendor", "model": "Model", "serial": "{:08X}".format(i), "scale": 1.0, "scale_filter": "linear",
+        "transform": "normal", "adaptive_sync_status": "disabled", "focused": i == 0,
+        "rect": {"x": 2560 * i, "y": 0, "width": 2560, "height": 1440} if active else {},
+        "modes": [mode, {"width": 1920, "height": 1080, "refresh": 60000}],
+        "current_mode": mode if active else None,
+    }
+
+
+def window(i):
+    return {
+        "id": 1000 + i, "type": "con", "name": "Window {} - some very long title of a browser tab".format(i),
+        "app_id": "app", "pid": 1000 + i, "rect": {"x": 0, "y": 0, "width": 1280, "height": 720},
+        "window_rect": {"x": 0, "y": 0, "width": 1280, "height": 720}, "layout": "none", "focused": False,
+        "border": "normal", "nodes": [], "floating_nodes": [], "marks": [],
+    }
+
+
+def tree_reply(outputs, windows):
+    """A GET_TREE reply w/ `windows` spread over 10 workspaces per output."""
+    workspaces = [{"id": 100 + w, "type": "workspace", "name": str(w + 1), "layout": "splith", "nodes": []}
+                  for w in range(10 * len(outputs))]
+    for n in range(windows):
+        workspaces[n % len(workspaces)]["nodes"].append(window(n))
+    nodes = [dict(output, nodes=workspaces[10 * i:10 * (i + 1)]) for i, output in enumerate(outputs)]
+    return json.dumps({"id": 0, "type": "root", "name": "root", "nodes": nodes})
+
+
+class Reply:
+    """Minimal stand-in of i3ipc.OutputReply."""
+
+    def __init__(self, data):
+        self.name = data["name"]
+        self.ipc_data = data
+
+
+class FakeSwayIpc(SwayIpc):
+    def __init__(self, reply):
+        super().__init__()
+        self.reply = reply
+
+    def get_outputs(self):
+        return [Reply(data) for data in json.loads(self.reply)]
+
+
+def outputs_from_tree(reply):
+    """The old way: decode the whole tree, and look for output nodes in it."""
+    outputs = {}
+    stack = [json.loads(reply)]
+    while stack:
+        node = stack.pop()
+        if node.get("type") == "output" and not node["name"].startswith("__"):
+            outputs[node["name"]] = SwayIpc._output_from_ipc_data(node)
+            continue
+        stack.extend(node.get("nodes", []))
+    return outputs
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of building the sway output model")
+    parser.add_argument("-o", "--outputs", type=int, default=3, help="Number of outputs (one of them inactive)")
+    parser.add_argument("-r", "--repeat", type=int, default=50, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    outputs = [output_data(i, active=i < args.outputs - 1) for i in range(args.outputs)]
+    ipc = FakeSwayIpc(json.dumps(outputs))
+
+    print("{:>8} {:>12} {:>14} {:>14}".format("windows", "tree bytes", "GET_TREE ms", "GET_OUTPUTS ms"))
+    for windows in WINDOW_COUNTS:
+        tree = tree_reply(outputs, windows)
+        assert len(outputs_from_tree(tree)) == len(ipc.list_outputs()) == args.outputs
+        print("{:>8} {:>12} {:>14.3f} {:>14.3f}".format(
+            windows, len(tree), timed(lambda: outputs_from_tree(tree), args.repeat) * 1000,
+            timed(ipc.list_outputs, args.repeat) * 1000))
+
+
+if __name__ == "__main__":
+    main()
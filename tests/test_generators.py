@@ -0,0 +1,94 @@
+"""
+Golden file tests of the config generators, and round trips through the matching parsers.
+Run `UPDATE_GOLDEN=1 python -m pytest tests` to regenerate the golden files after an intended format change.
+"""
+
+import os
+
+import pytest
+
+from nwg_displays.generators import (hyprland_config, niri_config, parse_hyprland_config, parse_niri_config,
+                                     parse_sway_config, sway_config)
+from nwg_displays.layout import Layout
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "golden")
+
+DISPLAYS = [
+    {"name": "eDP-1", "description": "Sharp Corporation 0x1453 Unknown", "x": 0, "y": 0,
+     "physical_width": 2560, "physical_height": 1600, "refresh": 165.0, "scale": 1.6, "transform": "normal",
+     "scale_filter": "smart", "adaptive_sync": True, "dpms": True},
+    {"name": "DP-2", "description": "Dell Inc. DELL U2720Q 8RLC123", "x": 1600, "y": -240,
+     "physical_width": 3840, "physical_height": 2160, "refresh": 59.997, "scale": 1.5, "transform": "90",
+     "scale_filter": "linear", "ten_bit": True},
+    {"name": "HDMI-A-1", "description": "LG Electronics LG TV 0x01010101", "x": 4040, "y": 0,
+     "physical_width": 1920, "physical_height": 1080, "refresh": 60.0, "scale": 1.0, "transform": "flipped-180",
+     "scale_filter": "nearest", "mirror": "eDP-1", "dpms": False},
+    {"name": "DP-3", "description": "Acer Technologies XV272U 0x0000ABCD", "x": 0, "y": 0,
+     "physical_width": 2560, "physical_height": 1440, "refresh": 144.0, "active": False},
+]
+
+# Attributes each format carries, i.e. that survive a round trip
+SWAY_KEYS = ("x", "y", "physical_width", "physical_height", "refresh", "scale", "transform", "scale_filter",
+             "adaptive_sync", "dpms", "custom_mode")
+HYPRLAND_KEYS = ("x", "y", "physical_width", "physical_height", "refresh", "scale", "transform", "mirror", "ten_bit")
+NIRI_KEYS = ("x", "y", "physical_width", "physical_height", "refresh", "scale", "transform", "adaptive_sync")
+
+FORMATS = {
+    "sway.conf": (lambda layout: sway_config(layout), parse_sway_config, SWAY_KEYS),
+    "sway-desc.conf": (lambda layout: sway_config(layout, use_desc=True), None, None),
+    "hyprland.conf": (lambda layout: hyprland_config(layout), parse_hyprland_config, HYPRLAND_KEYS),
+    "hyprland-desc.conf": (lambda layout: hyprland_config(layout, use_desc=True), None, None),
+    "niri.kdl": (lambda layout: niri_config(layout), parse_niri_config, NIRI_KEYS),
+}
+
+
+@pytest.fixture
+def layout():
+    return Layout.from_displays(DISPLAYS)
+
+
+@pytest.mark.parametrize("file_name", sorted(FORMATS))
+def test_golden(layout, file_name):
+    generate = FORMATS[file_name][0]
+    text = "\n".join(generate(layout)) + "\n"
+    path = os.path.join(GOLDEN_DIR, file_name)
+    if os.getenv("UPDATE_GOLDEN"):
+        with open(path, "w") as f:
+            f.write(text)
+
+    with open(path) as f:
+        assert text == f.read()
+
+
+@pytest.mark.parametrize("file_name", sorted(name for name in FORMATS if FORMATS[name][1]))
+def test_round_trip(layout, file_name):
+    generate, parse, keys = FORMATS[file_name]
+    lines = generate(layout)
+    parsed = Layout.from_displays(parse(lines))
+
+    assert [o.name for o in parsed] == [o.name for o in layout]
+    for original, output in zip(layout, parsed):
+        assert output.active == original.active, original.name
+        if original.active:
+            for key in keys:
+                assert getattr(output, key) == getattr(original, key), (original.name, key)
+
+    # Parsing is lossless for what the format carries: generating again gives the very same config
+    assert generate(parsed) == lines
+
+
+def test_sway_disabled_names(layout):
+    lines = sway_config(layout, disabled=["Unknown Monitor 1234"])
+    assert lines[-2:] == ['output "DP-3" disable', 'output "Unknown Monitor 1234" disable']
+
+
+@pytest.mark.parametrize("generate", [sway_config, hyprland_config, niri_config])
+def test_activity_overrides_output_state(layout, generate):
+    activity = {"eDP-1": False, "DP-3": True}
+    parse = {sway_config: parse_sway_config, hyprland_config: parse_hyprland_config,
+             niri_config: parse_niri_config}[generate]
+    parsed = {d["name"]: d for d in parse(generate(layout, activity=activity))}
+
+    assert not parsed["eDP-1"]["active"]
+    assert parsed["DP-3"]["active"]
+    assert parsed["DP-2"]["active"]
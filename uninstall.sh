@@ -14,7 +14,7 @@ for path in $PATTERN; do
 done
 
 # Remove launcher scripts
-filenames=("/usr/bin/nwg-displays")
+filenames=("/usr/bin/nwg-displays" "/usr/bin/nwg-displays-daemon")
 
 for filename in "${filenames[@]}"; do
   rm -f "$filename"